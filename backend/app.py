@@ -1,23 +1,144 @@
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
+from flask_socketio import SocketIO
+from werkzeug.exceptions import HTTPException
 from datetime import datetime
+import functools
+import hashlib
+import json
+import math
+import os
 import random
+import tempfile
+import time
+
+from models.anomaly_detector import StreamingAnomalyDetector
+from models.batching import MicroBatcher
+from models.pipeline import TextPipeline
+from models.registry import ModelNotReady, ModelRegistry
+from models.stylometry import build_result, extract_features
+from models.text_dedup import MinHashLSHIndex
+from utils.admission import AdmissionController, AdmissionRejected
+from utils.broadcast import DetectionBroadcaster
+from utils.bulk import iter_bulk_items, iter_scored_batches
+from utils.cache import DetectionCache, image_cache_key, text_cache_key
+from utils.jobs import JobManager, JobQueueFull, JobWorkersUnavailable
+from utils.metrics import MetricsRegistry, prometheus_text
+from utils.static_assets import StaticAssets, cached_response, compress_variants
+from utils.timeseries import TimeSeriesStore, group_readings
+from utils.tracing import tracer
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'truthguard-hackathon-2024'
 CORS(app, origins="*")
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+
+# Detector selection and micro-batching settings
+TEXT_MODEL = os.environ.get('TRUTHGUARD_TEXT_MODEL', 'builtin')  # 'builtin', 'stylometric', 'roberta' or 'cascade'
+CASCADE_LOW = float(os.environ.get('TRUTHGUARD_CASCADE_LOW', 0.2))  # stylometric score at or below: human, no transformer
+CASCADE_HIGH = float(os.environ.get('TRUTHGUARD_CASCADE_HIGH', 0.8))  # at or above: AI, no transformer
+IMAGE_MODEL = os.environ.get('TRUTHGUARD_IMAGE_MODEL', 'builtin')  # 'builtin' or 'opencv'
+VIDEO_MAX_MB = float(os.environ.get('TRUTHGUARD_VIDEO_MAX_MB', 200))  # upload limit of /api/detect-video
+VIDEO_SAMPLE_INTERVAL = float(os.environ.get('TRUTHGUARD_VIDEO_SAMPLE_INTERVAL', 0.2))  # seconds between sampled frames
+VIDEO_MAX_INTERVAL = float(os.environ.get('TRUTHGUARD_VIDEO_MAX_INTERVAL', 2.0))  # analyse at least this often
+VIDEO_CHANGE_THRESHOLD = float(os.environ.get('TRUTHGUARD_VIDEO_CHANGE_THRESHOLD', 4.0))  # thumbnail grey-level change
+VIDEO_SEGMENT_SECONDS = float(os.environ.get('TRUTHGUARD_VIDEO_SEGMENT_SECONDS', 2.0))  # timeline resolution
+PRELOAD_MODELS = os.environ.get('TRUTHGUARD_PRELOAD', '0') == '1'  # load before forking workers
+WARMUP_BATCHES = int(os.environ.get('TRUTHGUARD_WARMUP_BATCHES', 1))
+WARMUP_BATCH_SIZE = int(os.environ.get('TRUTHGUARD_WARMUP_BATCH_SIZE', 8))
+BATCH_MAX_SIZE = int(os.environ.get('TRUTHGUARD_BATCH_MAX_SIZE', 32))
+BATCH_MAX_WAIT_MS = float(os.environ.get('TRUTHGUARD_BATCH_MAX_WAIT_MS', 5))
+MODEL_SERVER_SOCKET = os.environ.get('TRUTHGUARD_MODEL_SERVER')  # Unix socket of models/model_server.py, if used
+MODEL_SERVER_TIMEOUT = float(os.environ.get('TRUTHGUARD_MODEL_SERVER_TIMEOUT', 60))
+TOKENIZER_WORKERS = int(os.environ.get('TRUTHGUARD_TOKENIZER_WORKERS', 0))  # >0 pipelines tokenize/forward (roberta)
+PIPELINE_QUEUE_SIZE = int(os.environ.get('TRUTHGUARD_PIPELINE_QUEUE_SIZE', 2))  # tokenized batches awaiting the model
+TORCH_THREADS = int(os.environ.get('TRUTHGUARD_TORCH_THREADS', 0))  # 0 keeps torch's default
+TORCH_INTEROP_THREADS = int(os.environ.get('TRUTHGUARD_TORCH_INTEROP_THREADS', 0))
+BULK_BATCH_SIZE = int(os.environ.get('TRUTHGUARD_BULK_BATCH_SIZE', 32))
+BULK_SORT_WINDOW = int(os.environ.get('TRUTHGUARD_BULK_SORT_WINDOW', 512))
+CACHE_MAX_ENTRIES = int(os.environ.get('TRUTHGUARD_CACHE_MAX_ENTRIES', 10000))
+CACHE_MAX_MB = float(os.environ.get('TRUTHGUARD_CACHE_MAX_MB', 64))
+CACHE_TTL = float(os.environ.get('TRUTHGUARD_CACHE_TTL', 3600))
+CACHE_DB = os.environ.get('TRUTHGUARD_CACHE_DB')  # optional SQLite file for a persistent tier
+TEXT_DEDUP = os.environ.get('TRUTHGUARD_TEXT_DEDUP', '1') == '1'
+DEDUP_THRESHOLD = float(os.environ.get('TRUTHGUARD_DEDUP_THRESHOLD', 0.8))
+DEDUP_MAX_ENTRIES = int(os.environ.get('TRUTHGUARD_DEDUP_MAX_ENTRIES', 100000))
+STATS_SHARED_DIR = os.environ.get('TRUTHGUARD_STATS_DIR')  # e.g. /dev/shm/truthguard-stats for pre-fork workers
+TRACING_ENABLED = os.environ.get('TRUTHGUARD_TRACING', '1') == '1'
+BROADCAST_INTERVAL_MS = float(os.environ.get('TRUTHGUARD_BROADCAST_INTERVAL_MS', 250))
+BROADCAST_MAX_EVENTS = int(os.environ.get('TRUTHGUARD_BROADCAST_MAX_EVENTS', 200))
+ADMISSION_CAPACITY = int(os.environ.get('TRUTHGUARD_ADMISSION_CAPACITY', 32))  # detections running at once
+ADMISSION_RESERVED_INTERACTIVE = int(os.environ.get('TRUTHGUARD_ADMISSION_RESERVED_INTERACTIVE', 4))
+INTERACTIVE_QUEUE_SIZE = int(os.environ.get('TRUTHGUARD_INTERACTIVE_QUEUE_SIZE', 64))
+BULK_QUEUE_SIZE = int(os.environ.get('TRUTHGUARD_BULK_QUEUE_SIZE', 256))
+ADMISSION_TIMEOUT = float(os.environ.get('TRUTHGUARD_ADMISSION_TIMEOUT', 30))  # queueing limit without a client deadline
+JOB_WORKERS = int(os.environ.get('TRUTHGUARD_JOB_WORKERS', 2))  # 0 disables /api/jobs
+JOB_MAX_PENDING = int(os.environ.get('TRUTHGUARD_JOB_MAX_PENDING', 100))
+JOB_TIMEOUT = float(os.environ.get('TRUTHGUARD_JOB_TIMEOUT', 300))
+JOB_RESULT_TTL = float(os.environ.get('TRUTHGUARD_JOB_RESULT_TTL', 600))
+JOB_MAX_WAIT = 30  # longest long-poll on GET /api/jobs/<job_id>
+SENSOR_CAPACITY = int(os.environ.get('TRUTHGUARD_SENSOR_CAPACITY', 100000))  # points kept per sensor metric
+SENSOR_MAX_SERIES = int(os.environ.get('TRUTHGUARD_SENSOR_MAX_SERIES', 1024))
+SENSOR_SNAPSHOT_PATH = os.environ.get('TRUTHGUARD_SENSOR_SNAPSHOT')  # optional .npz file
+SENSOR_SNAPSHOT_INTERVAL = float(os.environ.get('TRUTHGUARD_SENSOR_SNAPSHOT_INTERVAL', 60))
+ANOMALY_ALPHA = float(os.environ.get('TRUTHGUARD_ANOMALY_ALPHA', 0.05))  # EWMA smoothing factor
+ANOMALY_Z_THRESHOLD = float(os.environ.get('TRUTHGUARD_ANOMALY_Z', 4.0))
+ANOMALY_BURST_WINDOW = float(os.environ.get('TRUTHGUARD_ANOMALY_BURST_WINDOW', 60))
+ANOMALY_BURST_COUNT = int(os.environ.get('TRUTHGUARD_ANOMALY_BURST_COUNT', 3))
+FRONTEND_DIR = os.environ.get('TRUTHGUARD_FRONTEND_DIR',
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'frontend'))
+STATIC_MAX_AGE = int(os.environ.get('TRUTHGUARD_STATIC_MAX_AGE', 7 * 24 * 3600))  # fingerprinted (?v=<hash>) assets only
+
+# GLOBAL STATS (must be defined before routes): sharded counters and latency
+# histograms, aggregated across worker processes when STATS_SHARED_DIR is set
+ACCURACY_RATE = '92%'
+metrics = MetricsRegistry(shared_dir=STATS_SHARED_DIR)
+tracer.configure(metrics, enabled=TRACING_ENABLED)
+
+def record_detection(result, kind):
+    if 'error' in result:
+        metrics.inc(f'{kind}_errors')
+        return
+    metrics.inc('total_detections')
+    metrics.inc(f'{kind}_detections')
+    metrics.inc('ai_detected' if result.get('is_ai_generated') else 'human_detected')
+    broadcaster.publish(kind, result)
 
-# GLOBAL STATS VARIABLE (must be defined before routes)
-stats = {
-    'total_detections': 0,
-    'ai_detected': 0,
-    'human_detected': 0,
-    'accuracy_rate': '92%'
-}
+def dashboard_stats():
+    counters = metrics.aggregate()['counters']
+    return {
+        'total_detections': counters.get('total_detections', 0),
+        'ai_detected': counters.get('ai_detected', 0),
+        'human_detected': counters.get('human_detected', 0),
+        'accuracy_rate': ACCURACY_RATE
+    }
+
+# Live dashboards get detections and stats changes in 250 ms batches
+broadcaster = DetectionBroadcaster(socketio, stats=dashboard_stats, interval=BROADCAST_INTERVAL_MS / 1000,
+                                   max_events=BROADCAST_MAX_EVENTS)
+metrics.gauge('websocket_clients', lambda: broadcaster.client_count)
+
+def current_stats():
+    """Deployment-wide stats: detection counters plus per-endpoint latency"""
+    aggregate = metrics.aggregate()
+    counters = aggregate['counters']
+    return {
+        'total_detections': counters.get('total_detections', 0),
+        'ai_detected': counters.get('ai_detected', 0),
+        'human_detected': counters.get('human_detected', 0),
+        'accuracy_rate': ACCURACY_RATE,
+        'counters': counters,
+        'gauges': aggregate['gauges'],
+        'latency': aggregate['latency'],
+        'distributions': aggregate['distributions'],
+        'processes': aggregate['processes']
+    }
 
 # BUILT-IN AI DETECTOR CLASSES
 class EnhancedTextDetector:
+    model_version = 'builtin-heuristic-v1'
+
     def __init__(self):
         print("✅ Text detector initialized!")
         
@@ -43,7 +164,16 @@ class EnhancedTextDetector:
             'timestamp': datetime.now().isoformat()
         }
 
+    def detect_batch(self, texts):
+        return [self.detect_text(text) for text in texts]
+
+    def detect_long_text(self, text):
+        # The heuristic has no token limit, so long documents need no windowing
+        return self.detect_text(text)
+
 class ImageDetector:
+    model_version = 'builtin-image-v1'
+
     def __init__(self):
         print("✅ Image detector initialized!")
         
@@ -59,16 +189,253 @@ class ImageDetector:
             'timestamp': datetime.now().isoformat()
         }
 
+    def detect_batch(self, images, remember=True):
+        return [self.detect_manipulation(image_data) for image_data in images]
+
+# Detector factories: heavy imports (torch, transformers, cv2) happen inside
+# them, on the loader thread, so importing the app stays fast
+def load_transformer_detector():
+    if MODEL_SERVER_SOCKET:
+        # Weights live once in the model server; this process only holds a socket path
+        from models.model_server import ModelServerClient
+        return ModelServerClient(MODEL_SERVER_SOCKET, timeout=MODEL_SERVER_TIMEOUT)
+    from models.text_detector import EnhancedTextDetector as RobertaTextDetector
+    return RobertaTextDetector()
+
+def load_text_detector():
+    if TEXT_MODEL == 'roberta':
+        return load_transformer_detector()
+    if TEXT_MODEL in ('stylometric', 'cascade'):
+        from models.stylometry import StylometricDetector
+        if TEXT_MODEL == 'stylometric':
+            return StylometricDetector()
+        from models.cascade import CascadeTextDetector
+        return CascadeTextDetector(StylometricDetector(), load_transformer_detector(),
+                                   low=CASCADE_LOW, high=CASCADE_HIGH)
+    return EnhancedTextDetector()
+
+def load_image_detector():
+    if IMAGE_MODEL == 'opencv':
+        from models.image_detector import ImageDetector as OpenCVImageDetector
+        return OpenCVImageDetector()
+    return ImageDetector()
+
+WARMUP_TEXTS = [
+    "Artificial intelligence has revolutionized numerous industries by automating complex processes.",
+    "I've been thinking about this whole AI thing lately, and honestly, it's kind of wild.",
+]
+WARMUP_IMAGE = "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAgAAAAICAIAAABLbSncAAAAD0lEQVR4nGNowAEYhpYEAILzYAGc7g8kAAAAAElFTkSuQmCC"
+
+def warm_up_text(detector):
+    # A cascade may exit early on every warm-up text, so warm its transformer directly
+    detector = getattr(detector, 'second_stage', detector)
+    batch = (WARMUP_TEXTS * WARMUP_BATCH_SIZE)[:WARMUP_BATCH_SIZE]
+    for _ in range(WARMUP_BATCHES):
+        detector.detect_batch(batch)
+
+def warm_up_image(detector):
+    for _ in range(WARMUP_BATCHES):
+        detector.detect_manipulation(WARMUP_IMAGE)
+
+# Heavy analyses run as async jobs on worker processes forked right after
+# the models load, so each worker starts with the weights already in memory
+jobs = JobManager(max_workers=JOB_WORKERS, max_pending=JOB_MAX_PENDING, default_timeout=JOB_TIMEOUT,
+                  result_ttl=JOB_RESULT_TTL, on_result=lambda kind, result: record_detection(result, kind)) \
+    if JOB_WORKERS > 0 else None
+
+if jobs is not None:
+    metrics.gauge('queue_depth:jobs', lambda: jobs.pending)
+
+def start_job_workers(detectors):
+    if jobs is not None:
+        jobs.start(detectors, warmups={'text': warm_up_text, 'image': warm_up_image})
+
+# Tokenization and forward passes of consecutive batches overlap on
+# dedicated threads; started after the job workers fork
+text_pipeline = None
+
+def start_text_pipeline(detectors):
+    global text_pipeline
+    if TOKENIZER_WORKERS > 0 and hasattr(detectors['text'], 'tokenize'):
+        text_pipeline = TextPipeline(detectors['text'], tokenizer_workers=TOKENIZER_WORKERS,
+                                     queue_size=PIPELINE_QUEUE_SIZE, num_threads=TORCH_THREADS or None,
+                                     interop_threads=TORCH_INTEROP_THREADS or None)
+        for stage in ('tokenizer', 'model'):
+            for name in ('queue_depth', 'utilization'):
+                metrics.gauge(f'{name}:pipeline_{stage}',
+                              lambda stage=stage, name=name: text_pipeline.stats()[stage][name])
+
+# Videos are sampled frames run through whichever image detector loaded
+video_detector = None
+
+def start_video_detector(detectors):
+    global video_detector
+    from models.video_detector import VideoDetector
+    video_detector = VideoDetector(detectors['image'], sample_interval=VIDEO_SAMPLE_INTERVAL,
+                                   max_interval=VIDEO_MAX_INTERVAL, change_threshold=VIDEO_CHANGE_THRESHOLD,
+                                   segment_seconds=VIDEO_SEGMENT_SECONDS)
+
 # Initialize detectors
 print("🚀 Initializing TruthGuard AI System...")
-text_detector = EnhancedTextDetector()
-image_detector = ImageDetector()
-print("✅ All AI models loaded successfully!")
+models = ModelRegistry(
+    {'text': load_text_detector, 'image': load_image_detector},
+    warmups={'text': warm_up_text, 'image': warm_up_image},
+    on_loaded=[start_job_workers, start_text_pipeline, start_video_detector]
+)
+if PRELOAD_MODELS:
+    # Pre-fork servers: weights load once here and are shared copy-on-write;
+    # each worker runs the warm-up after fork (see gunicorn.conf.py)
+    models.preload()
+else:
+    models.start()
 
-@app.route('/')
-def dashboard():
-    """Main TruthGuard AI Dashboard - STATS PROPERLY PASSED HERE"""
-    return render_template_string('''
+# Concurrent /api/detect-text calls share one tokenizer call and forward pass
+def record_text_batch(size, wait_seconds):
+    metrics.histogram('batch_size:text', unit='items').record(size)
+    metrics.histogram('queue_wait:text_batcher').record(wait_seconds)
+
+def text_batch_submitter():
+    """Non-blocking batch submit of the pipeline or the model server client, if either is in use"""
+    if text_pipeline is not None:
+        return text_pipeline.submit
+    return getattr(models.get('text'), 'submit', None)
+
+def process_text_batch(texts):
+    # With a submitter, the batcher hands the batch off and starts on the next one
+    submit = text_batch_submitter()
+    if submit is not None:
+        return submit(texts)
+    return models.get('text').detect_batch(texts)
+
+text_batcher = MicroBatcher(process_text_batch, max_batch_size=BATCH_MAX_SIZE,
+                            max_wait_ms=BATCH_MAX_WAIT_MS, name='text-batcher', on_batch=record_text_batch)
+metrics.gauge('queue_depth:text_batcher', lambda: text_batcher.queue_depth)
+
+def cascade_count(name):
+    detector = models.get('text') if models.ready else None
+    return detector.stats()[name] if hasattr(detector, 'stats') else 0
+
+if TEXT_MODEL == 'cascade':
+    metrics.gauge('cascade:early_exit', lambda: cascade_count('early_exit'))
+    metrics.gauge('cascade:forwarded', lambda: cascade_count('forwarded'))
+
+# Content-addressed result cache in front of both detectors
+detection_cache = DetectionCache(max_entries=CACHE_MAX_ENTRIES, max_bytes=int(CACHE_MAX_MB * 1024 * 1024),
+                                 ttl=CACHE_TTL, disk_path=CACHE_DB)
+
+# Lightly edited copies of already-scored texts reuse the earlier verdict
+text_dedup = MinHashLSHIndex(threshold=DEDUP_THRESHOLD, max_entries=DEDUP_MAX_ENTRIES) if TEXT_DEDUP else None
+
+def detect_text_deduplicated(text):
+    if text_dedup is None:
+        return text_batcher.submit(text)
+    signature = text_dedup.signature(text)
+    match = text_dedup.query(signature)
+    if match is not None:
+        # Only the verdict is reused; the metadata describes the submitted text
+        cluster_id, similarity, ai_probability, is_ai_generated = match
+        result = build_result(ai_probability, extract_features([text])[0],
+                              analysis_type='near_duplicate_text_detection')
+        result['is_ai_generated'] = is_ai_generated
+        result['explanation'] = (f"Near-duplicate of a previously analysed text ({similarity:.0%} similar); "
+                                 f"reusing its verdict: {'AI-generated' if is_ai_generated else 'human-written'}.")
+        result['cluster_id'] = cluster_id
+        result['near_duplicate_of'] = {'cluster_id': cluster_id, 'similarity': similarity}
+        return result
+    result = text_batcher.submit(text)
+    if 'error' not in result:
+        result['cluster_id'] = text_dedup.add(signature, result['ai_probability'], result['is_ai_generated'])
+    return result
+
+static_assets = StaticAssets(FRONTEND_DIR, max_age=STATIC_MAX_AGE)
+
+# Admission control: bounded interactive (dashboard) and bulk (API) lanes in
+# front of the detectors, so a backlog of API traffic can't stall the UI
+admission = AdmissionController(
+    capacity=ADMISSION_CAPACITY,
+    max_queue={'interactive': INTERACTIVE_QUEUE_SIZE, 'bulk': BULK_QUEUE_SIZE},
+    reserved_interactive=ADMISSION_RESERVED_INTERACTIVE,
+    default_timeout=ADMISSION_TIMEOUT,
+    on_admit=lambda lane, waited: metrics.histogram('queue_wait:admission_' + lane).record(waited),
+    on_reject=lambda lane, reason: metrics.inc(f'admission_rejected:{lane}_{reason}')
+)
+for lane in ('interactive', 'bulk'):
+    metrics.gauge('queue_depth:admission_' + lane, lambda lane=lane: admission.stats()['queued'][lane])
+
+def request_deadline():
+    """Client deadline from X-Request-Deadline (epoch seconds) or X-Request-Timeout-Ms"""
+    if 'X-Request-Deadline' in request.headers:
+        return float(request.headers['X-Request-Deadline'])
+    if 'X-Request-Timeout-Ms' in request.headers:
+        return time.time() + float(request.headers['X-Request-Timeout-Ms']) / 1000
+    return None
+
+def admission_controlled(lane=None):
+    """Run the view only once admitted; ``lane`` overrides the X-Request-Lane header"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                deadline = request_deadline()
+                ticket = admission.admit(lane or request.headers.get('X-Request-Lane', 'bulk'), deadline)
+            except ValueError as e:
+                return jsonify({'error': f'Invalid admission headers: {e}'}), 400
+            try:
+                response = app.make_response(view(*args, **kwargs))
+            except BaseException:
+                ticket.release()
+                raise
+            if response.is_streamed:
+                # Streaming bodies do their work after the view returns
+                response.call_on_close(ticket.release)
+            else:
+                ticket.release()
+            return response
+        return wrapper
+    return decorator
+
+# IoT readings: fixed-size ring buffers per sensor metric
+sensor_store = TimeSeriesStore(capacity=SENSOR_CAPACITY, max_series=SENSOR_MAX_SERIES,
+                               snapshot_path=SENSOR_SNAPSHOT_PATH, snapshot_interval=SENSOR_SNAPSHOT_INTERVAL)
+anomaly_detector = StreamingAnomalyDetector(alpha=ANOMALY_ALPHA, z_threshold=ANOMALY_Z_THRESHOLD,
+                                            burst_window=ANOMALY_BURST_WINDOW, burst_count=ANOMALY_BURST_COUNT)
+
+@app.before_request
+def ensure_models_loading():
+    g.request_start = time.perf_counter()
+    if not models.ready:
+        models.start()
+
+@app.after_request
+def record_latency(response):
+    start = g.pop('request_start', None)
+    if start is not None and request.endpoint:
+        metrics.histogram('request:' + request.endpoint).record(time.perf_counter() - start)
+        metrics.inc(f'responses_{response.status_code // 100}xx')
+    return response
+
+@socketio.on('connect')
+def dashboard_connected():
+    broadcaster.add_client(request.sid)
+
+@socketio.on('disconnect')
+def dashboard_disconnected(*args):
+    broadcaster.remove_client(request.sid)
+
+@app.errorhandler(AdmissionRejected)
+def admission_rejected(e):
+    response = jsonify({'error': str(e), 'admission': admission.stats()})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, e.status
+
+@app.errorhandler(ModelNotReady)
+def models_not_ready(e):
+    response = jsonify({'error': str(e), 'status': models.status()})
+    response.headers['Retry-After'] = '5'
+    return response, 503
+
+# Dashboard page: compiled once; the rendered page is cached until the stats change
+DASHBOARD_HTML = '''
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -76,6 +443,7 @@ def dashboard():
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>TruthGuard AI - Multi-Modal Authenticity Detection</title>
     <link href="https://cdn.jsdelivr.net/npm/tailwindcss@2.2.19/dist/tailwind.min.css" rel="stylesheet">
+    <script src="https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.7.2/socket.io.js"></script>
 </head>
 <body class="bg-white text-black min-h-screen">
     <!-- Navigation -->
@@ -228,11 +596,15 @@ def dashboard():
             try {
                 const response = await fetch('/api/detect-text', {
                     method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
+                    headers: { 'Content-Type': 'application/json', 'X-Request-Lane': 'interactive' },
                     body: JSON.stringify({ text: text })
                 });
                 
                 const data = await response.json();
+                if (!response.ok) {
+                    alert(data.error || 'Analysis failed!');
+                    return;
+                }
                 displayResults(data);
                 
             } catch (error) {
@@ -289,16 +661,19 @@ def dashboard():
             
             resultsSection.classList.remove('hidden');
             resultsSection.scrollIntoView({ behavior: 'smooth' });
-            
-            // Update stats
-            document.getElementById('totalScans').textContent = parseInt(document.getElementById('totalScans').textContent) + 1;
-            if (data.is_ai_generated) {
-                document.getElementById('aiDetected').textContent = parseInt(document.getElementById('aiDetected').textContent) + 1;
-            } else {
-                document.getElementById('humanDetected').textContent = parseInt(document.getElementById('humanDetected').textContent) + 1;
-            }
         }
 
+        // Live stats: the server pushes batched updates (changed stats only)
+        const socket = io();
+        socket.on('detection_update', function(payload, ack) {
+            const batch = typeof payload === 'string' ? JSON.parse(payload) : payload;
+            const stats = batch.stats || {};
+            if ('total_detections' in stats) document.getElementById('totalScans').textContent = stats.total_detections;
+            if ('ai_detected' in stats) document.getElementById('aiDetected').textContent = stats.ai_detected;
+            if ('human_detected' in stats) document.getElementById('humanDetected').textContent = stats.human_detected;
+            if (ack) ack();
+        });
+
         // Image analysis
         async function analyzeImage() {
             const btn = document.getElementById('analyzeImageBtn');
@@ -336,46 +711,344 @@ def dashboard():
     </script>
 </body>
 </html>
-    ''', stats=stats)  # ← KEY: stats variable properly passed here
+    '''
+dashboard_template = app.jinja_env.from_string(DASHBOARD_HTML)
+dashboard_page = (None, None, None)  # (stats key, encoded variants, ETag)
+
+@app.route('/')
+def dashboard():
+    """Main TruthGuard AI Dashboard - STATS PROPERLY PASSED HERE"""
+    global dashboard_page
+    stats = dashboard_stats()
+    key = tuple(sorted(stats.items()))
+    cached_key, variants, etag = dashboard_page
+    if cached_key != key:
+        body = dashboard_template.render(stats=stats).encode('utf-8')
+        variants = compress_variants(body, 'text/html')
+        etag = hashlib.sha1(body).hexdigest()[:20]
+        dashboard_page = (key, variants, etag)
+    return cached_response(variants, etag, 'text/html', 'no-cache')
+
+@app.route('/frontend/')
+@app.route('/frontend/<path:filename>')
+def frontend_asset(filename='index.html'):
+    """Frontend files from memory, precompressed, with ETag and cache headers"""
+    return static_assets.response(filename)
 
 @app.route('/api/detect-text', methods=['POST'])
+@admission_controlled()
 def detect_text():
+    text_detector = models.get('text')
     try:
-        data = request.get_json()
+        with tracer.span('http.parse_json'):
+            data = request.get_json()
         text = data['text']
-        result = text_detector.detect_text(text)
-        
-        # Update global stats
-        stats['total_detections'] += 1
-        if result.get('is_ai_generated'):
-            stats['ai_detected'] += 1
+        if data.get('long_document'):
+            key = text_cache_key(text, text_detector.model_version + ':long')
+            result = detection_cache.get_or_compute(key, lambda: text_detector.detect_long_text(text))
         else:
-            stats['human_detected'] += 1
+            key = text_cache_key(text, text_detector.model_version)
+            result = detection_cache.get_or_compute(key, lambda: detect_text_deduplicated(text))
+        record_detection(result, 'text')
         
-        return jsonify(result)
+        with tracer.span('http.build_response'):
+            return jsonify(result)
+    except HTTPException:
+        raise
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid request: {e}'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/detect-text/bulk', methods=['POST'])
+@admission_controlled(lane='bulk')
+def detect_text_bulk():
+    """Score a JSON array or NDJSON body of texts, streaming NDJSON results"""
+    text_detector = models.get('text')
+    items = iter_bulk_items(request.stream, request.content_type or '')
+
+    def generate():
+        try:
+            for client_id, result in iter_scored_batches(text_detector.detect_batch, items,
+                                                         batch_size=BULK_BATCH_SIZE,
+                                                         window=BULK_SORT_WINDOW,
+                                                         submit=text_batch_submitter()):
+                record_detection(result, 'text')
+                yield json.dumps({'id': client_id, 'result': result}) + '\n'
+        except ValueError as e:
+            yield json.dumps({'error': str(e)}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def read_image_upload():
+    """Return the uploaded image as raw bytes, a file stream or a base64 string.
+
+    Binary bodies (application/octet-stream, image/*) and multipart uploads skip
+    the base64 round-trip; JSON bodies with a data URL are kept for the browser UI.
+    """
+    mimetype = request.mimetype or ''
+    if mimetype == 'application/octet-stream' or mimetype.startswith('image/'):
+        return request.get_data(cache=False)
+    if mimetype == 'multipart/form-data':
+        upload = request.files.get('image') or next(iter(request.files.values()), None)
+        if upload is None:
+            raise KeyError('image')
+        return upload.stream
+    with tracer.span('http.parse_json'):
+        return request.get_json()['image']
+
 @app.route('/api/detect-image', methods=['POST'])
+@admission_controlled()
 def detect_image():
+    image_detector = models.get('image')
     try:
-        data = request.get_json()
-        result = image_detector.detect_manipulation(data['image'])
+        image = read_image_upload()
+        key = image_cache_key(image, image_detector.model_version)
+        result = detection_cache.get_or_compute(key, lambda: image_detector.detect_manipulation(image))
+        record_detection(result, 'image')
         
-        # Update global stats
-        stats['total_detections'] += 1
-        if result.get('is_ai_generated'):
-            stats['ai_detected'] += 1
+        with tracer.span('http.build_response'):
+            return jsonify(result)
+    except HTTPException:
+        raise
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid request: {e}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/detect-image/batch', methods=['POST'])
+@admission_controlled(lane='bulk')
+def detect_image_batch():
+    """Analyse many images at once (multipart files or a JSON list of data URLs)"""
+    image_detector = models.get('image')
+    try:
+        if request.mimetype == 'multipart/form-data':
+            images = [upload.stream for upload in request.files.getlist('images') or request.files.values()]
         else:
-            stats['human_detected'] += 1
-        
-        return jsonify(result)
+            images = request.get_json()['images']
+        keys = [image_cache_key(image, image_detector.model_version) for image in images]
+        results = [detection_cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        for i, result in zip(missing, image_detector.detect_batch([images[i] for i in missing])):
+            results[i] = result
+            if 'error' not in result:
+                detection_cache.set(keys[i], result)
+
+        for result in results:
+            record_detection(result, 'image')
+
+        return jsonify({'results': results})
+    except HTTPException:
+        raise
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid request: {e}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def spool_video_upload(target):
+    """Copy the uploaded video (multipart 'video' field or a binary body) to ``target`` in chunks.
+
+    Returns the size in bytes, or None once the upload exceeds VIDEO_MAX_MB.
+    """
+    mimetype = request.mimetype or ''
+    if mimetype == 'multipart/form-data':
+        source = request.files.get('video') or next(iter(request.files.values()), None)
+        if source is None:
+            raise KeyError('video')
+    elif mimetype == 'application/octet-stream' or mimetype.startswith(('video/', 'image/')):
+        source = request.stream
+    else:
+        raise ValueError(f'Unsupported content type for video: {mimetype or "none"}')
+    limit = int(VIDEO_MAX_MB * 1024 * 1024)
+    size = 0
+    for chunk in iter(lambda: source.read(1024 * 1024), b''):
+        size += len(chunk)
+        if size > limit:
+            return None
+        target.write(chunk)
+    target.flush()
+    target.seek(0)
+    return size
+
+@app.route('/api/detect-video', methods=['POST'])
+@admission_controlled()
+def detect_video():
+    """Analyse a video or animated GIF, returning an overall score and a per-segment timeline"""
+    models.get('image')
+    try:
+        with tempfile.NamedTemporaryFile(prefix='truthguard-video-') as upload:
+            with tracer.span('video.spool'):
+                size = spool_video_upload(upload)
+            if size is None:
+                return jsonify({'error': f'Video exceeds the {VIDEO_MAX_MB:g} MB limit'}), 413
+            if not size:
+                return jsonify({'error': 'Empty video upload'}), 400
+            detector = video_detector
+            key = image_cache_key(upload, detector.model_version)
+            result = detection_cache.get_or_compute(key, lambda: detector.detect_video(upload.name))
+        record_detection(result, 'video')
+
+        with tracer.span('http.build_response'):
+            return jsonify(result)
+    except HTTPException:
+        raise
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid request: {e}'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Queue a text or image analysis and return its job ID immediately.
+
+    JSON bodies give ``type`` ('text' or 'image') plus ``text`` (optionally
+    with ``long_document``) or ``image``; binary and multipart bodies are
+    image jobs. An optional ``timeout`` (seconds) is capped at JOB_TIMEOUT.
+    """
+    models.get('text')
+    if jobs is None or not jobs.started:
+        return jsonify({'error': 'Job workers are not running'}), 503
+    try:
+        data = request.get_json() if request.mimetype == 'application/json' else {}
+        kind = data.get('type', 'text' if 'text' in data else 'image')
+        if kind == 'text':
+            payload = data['text']
+            options = {'long_document': bool(data.get('long_document'))}
+        elif kind == 'image':
+            payload = read_image_upload()
+            if hasattr(payload, 'read'):
+                payload = payload.read()
+            options = {}
+        else:
+            return jsonify({'error': f'Unknown job type: {kind}'}), 400
+        timeout = data.get('timeout', request.args.get('timeout'))
+        if timeout is not None:
+            timeout = float(timeout)
+            if not math.isfinite(timeout):
+                raise ValueError("timeout must be a finite number of seconds")
+        timeout = JOB_TIMEOUT if timeout is None else min(timeout, JOB_TIMEOUT)
+        job_id = jobs.submit(kind, payload, options, timeout=timeout)
+    except JobQueueFull as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 429
+    except JobWorkersUnavailable as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid job request: {e}'}), 400
+
+    response = jsonify({'job_id': job_id, 'state': 'queued', 'status_url': f'/api/jobs/{job_id}'})
+    response.headers['Location'] = f'/api/jobs/{job_id}'
+    return response, 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Job state and result; ``?wait=N`` long-polls up to N seconds"""
+    if jobs is None:
+        return jsonify({'error': 'Job workers are not running'}), 503
+    wait_seconds = min(float(request.args.get('wait', 0)), JOB_MAX_WAIT)
+    job = jobs.get(job_id, wait_seconds=wait_seconds)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a job that has not started running yet"""
+    if jobs is None:
+        return jsonify({'error': 'Job workers are not running'}), 503
+    job = jobs.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    if job['state'] in ('queued', 'running'):
+        return jsonify(dict(job, error='Job is already running')), 409
+    return jsonify(job)
+
+@app.route('/api/sensor-data', methods=['POST'])
+def ingest_sensor_data():
+    """Store one reading, a list of readings or ``{'readings': [...]}``"""
+    try:
+        data = request.get_json()
+        readings = data.get('readings') if isinstance(data, dict) and 'readings' in data else data
+        if isinstance(readings, dict):
+            readings = [readings]
+        if not isinstance(readings, list):
+            raise ValueError("Expected a reading or a list of readings")
+        grouped = group_readings(readings)
+        points = sensor_store.add(grouped)
+        alerts = anomaly_detector.update_grouped(grouped)
+        metrics.inc('sensor_points', points)
+        for alert in alerts:
+            metrics.inc(f"sensor_alerts:{alert['type']}")
+            broadcaster.publish_alert(alert)
+        return jsonify({'accepted': len(readings), 'points': points, 'alerts': alerts})
+    except (AttributeError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid sensor data: {e}'}), 400
+
+@app.route('/api/sensor-data', methods=['GET'])
+def list_sensor_series():
+    return jsonify({'series': sensor_store.series(), 'stats': sensor_store.stats()})
+
+@app.route('/api/sensor-alerts')
+def sensor_alerts():
+    """Most recent anomaly alerts, newest first"""
+    limit = int(request.args.get('limit', 100))
+    return jsonify({'alerts': list(anomaly_detector.recent_alerts)[::-1][:limit]})
+
+@app.route('/api/sensor-data/<sensor>/<metric>', methods=['GET'])
+def query_sensor_data(sensor, metric):
+    """Points in [start, end) (default: the last hour), bucketed to min/max/mean when ``buckets`` > 0"""
+    try:
+        end = float(request.args.get('end', time.time()))
+        start = float(request.args.get('start', end - 3600))
+        buckets = int(request.args.get('buckets', 200))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {e}'}), 400
+    if end <= start or buckets < 0:
+        return jsonify({'error': 'Invalid query: need start < end and buckets >= 0'}), 400
+    series = sensor_store.query(sensor, metric, start, end, buckets=min(buckets, 10000))
+    if series is None:
+        return jsonify({'error': f'No data for {sensor}/{metric}'}), 404
+    return jsonify(dict(series, sensor=sensor, metric=metric, start=start, end=end))
+
+@app.route('/api/health/live')
+def health_live():
+    """Liveness: the process is up and serving requests"""
+    return jsonify({'status': 'alive'})
+
+@app.route('/api/health/ready')
+def health_ready():
+    """Readiness: models are loaded and warmed up"""
+    status = models.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+@app.route('/api/stats')
+def api_stats():
+    return jsonify(current_stats())
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus text exposition of counters, gauges and latency histograms"""
+    labels = {'text_model': TEXT_MODEL, 'image_model': IMAGE_MODEL}
+    if models.ready:
+        text_detector = models.get('text')
+        backend = getattr(getattr(text_detector, 'second_stage', text_detector), 'backend', None)
+        labels['text_backend'] = backend.name if backend is not None else 'builtin'
+    return Response(prometheus_text(metrics.aggregate(), labels=labels),
+                    mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/cache/stats')
+def cache_stats():
+    cache = detection_cache.stats()
+    if text_dedup is not None:
+        cache['text_dedup'] = text_dedup.stats()
+    return jsonify(cache)
+
 if __name__ == '__main__':
     print("🛡️ TruthGuard AI Backend Starting...")
     print("📡 Access your app at: http://localhost:5000")
     print("🏆 Ready for Hackathon Demo!")
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    socketio.run(app, debug=True, host='0.0.0.0', port=5000, allow_unsafe_werkzeug=True)
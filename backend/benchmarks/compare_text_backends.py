@@ -0,0 +1,158 @@
+"""Accuracy-parity and latency/RSS comparison of the text model backends.
+
+Each backend is measured in its own subprocess so RSS numbers are not
+polluted by the other models. Probabilities are compared against the fp32
+torch backend on the same texts.
+
+    python backend/benchmarks/compare_text_backends.py --backends torch torch-int8 onnx
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SAMPLE_TEXTS = [
+    "Artificial intelligence has revolutionized numerous industries by automating complex processes "
+    "and enabling data-driven decision making.",
+    "I've been thinking about this whole AI thing lately, and honestly, it's kind of wild how fast "
+    "everything is moving.",
+    "Furthermore, the results demonstrate that the proposed methodology consistently outperforms "
+    "existing baselines across all evaluated benchmarks.",
+    "ok so the bus was late AGAIN and i missed the first half of the lecture lol",
+    "Machine learning algorithms can analyze vast datasets to identify patterns and make predictions "
+    "with remarkable accuracy. This technological advancement has transformed business operations.",
+    "My grandmother's recipe never measured anything. A handful of this, a splash of that.",
+    "In conclusion, it is important to note that climate change represents a multifaceted challenge "
+    "requiring coordinated global action.",
+    "Can't believe the game went to overtime, my heart is still racing tbh",
+]
+
+
+def current_rss_mb():
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(backend, texts, iterations, batch_size, num_threads):
+    """Runs inside the worker subprocess"""
+    baseline_rss = current_rss_mb()
+    start = time.perf_counter()
+    from models.text_detector import EnhancedTextDetector
+    detector = EnhancedTextDetector(backend=backend, num_threads=num_threads)
+    load_seconds = time.perf_counter() - start
+    loaded_rss = current_rss_mb()
+
+    probabilities = [result['ai_probability'] for result in detector.detect_batch(texts)]
+
+    single_latencies = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        detector.detect_text(texts[i % len(texts)])
+        single_latencies.append((time.perf_counter() - start) * 1000)
+
+    batch = (texts * (batch_size // len(texts) + 1))[:batch_size]
+    batch_latencies = []
+    for _ in range(max(1, iterations // 4)):
+        start = time.perf_counter()
+        detector.detect_batch(batch)
+        batch_latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'backend': backend,
+        'load_seconds': load_seconds,
+        'rss_mb_before_load': baseline_rss,
+        'rss_mb_after_load': loaded_rss,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'latency_ms_single': {
+            'p50': percentile(single_latencies, 50),
+            'p95': percentile(single_latencies, 95),
+            'mean': sum(single_latencies) / len(single_latencies)
+        },
+        'latency_ms_batch': {
+            'batch_size': batch_size,
+            'p50': percentile(batch_latencies, 50),
+            'p95': percentile(batch_latencies, 95),
+            'texts_per_second': batch_size * 1000 / percentile(batch_latencies, 50)
+        },
+        'probabilities': probabilities
+    }
+
+
+def compare(reports, reference='torch'):
+    """Attach parity figures against the reference backend's probabilities"""
+    ref = next((r for r in reports if r['backend'] == reference), None)
+    if ref is None:
+        return reports
+    for report in reports:
+        diffs = [abs(a - b) for a, b in zip(report['probabilities'], ref['probabilities'])]
+        agreements = [(a > 0.5) == (b > 0.5) for a, b in zip(report['probabilities'], ref['probabilities'])]
+        report['parity'] = {
+            'reference': reference,
+            'max_abs_diff': max(diffs),
+            'mean_abs_diff': sum(diffs) / len(diffs),
+            'label_agreement': sum(agreements) / len(agreements)
+        }
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', nargs='+', default=['torch', 'torch-int8', 'onnx'])
+    parser.add_argument('--iterations', type=int, default=40)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--texts', help='optional file with one sample text per line')
+    parser.add_argument('--max-diff', type=float, default=0.05,
+                        help='fail if any backend differs from fp32 by more than this')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    texts = SAMPLE_TEXTS
+    if args.texts:
+        with open(args.texts) as f:
+            texts = [line.strip() for line in f if line.strip()]
+
+    if args.worker:
+        print(json.dumps(measure(args.worker, texts, args.iterations, args.batch_size, args.threads)))
+        return 0
+
+    reports = []
+    for backend in args.backends:
+        command = [sys.executable, os.path.abspath(__file__), '--worker', backend,
+                   '--iterations', str(args.iterations), '--batch-size', str(args.batch_size)]
+        if args.threads:
+            command += ['--threads', str(args.threads)]
+        if args.texts:
+            command += ['--texts', args.texts]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        reports.append(json.loads(output.strip().splitlines()[-1]))
+
+    reports = compare(reports)
+    print(json.dumps(reports, indent=2))
+
+    failed = [r['backend'] for r in reports if r.get('parity', {}).get('max_abs_diff', 0) > args.max_diff]
+    if failed:
+        print(f"❌ Parity check failed for: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""Early-exit rate and accuracy impact of the stylometric/transformer cascade.
+
+Scores every text with both stages once, then reports each threshold pair:
+how many texts skip the transformer, how often the cascade agrees with the
+transformer alone and, when the input is labelled, the accuracy of each.
+
+    python backend/benchmarks/evaluate_cascade.py --data labelled.jsonl \\
+        --thresholds 0.2:0.8 0.1:0.9 0.3:0.7
+
+``--data`` is JSONL with a ``text`` and an optional boolean ``label``
+(true = AI-generated) per line; without it the built-in sample texts are used.
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.compare_text_backends import SAMPLE_TEXTS
+
+
+def load_samples(path):
+    texts, labels = [], []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                sample = json.loads(line)
+                texts.append(sample['text'])
+                labels.append(sample.get('label'))
+    return texts, labels if all(label is not None for label in labels) else None
+
+
+def parse_threshold(value):
+    low, high = (float(part) for part in value.split(':'))
+    return low, high
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', help='JSONL file of {"text", "label"} samples')
+    parser.add_argument('--thresholds', nargs='+', type=parse_threshold, default=[(0.2, 0.8)],
+                        help='low:high pairs to evaluate')
+    parser.add_argument('--backend', default='torch', help='transformer backend for the second stage')
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+
+    texts, labels = load_samples(args.data) if args.data else (SAMPLE_TEXTS, None)
+
+    from models.cascade import CascadeTextDetector
+    from models.stylometry import StylometricDetector
+    from models.text_detector import EnhancedTextDetector
+    cascade = CascadeTextDetector(StylometricDetector(), EnhancedTextDetector(backend=args.backend))
+    report = cascade.evaluate(texts, labels, thresholds=args.thresholds, batch_size=args.batch_size)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Time and peak RSS of the tiled image forensics against image size.
+
+Synthetic JPEGs are written to a temp directory, then each one is analysed
+in a fresh subprocess so its peak RSS (VmHWM) reflects that image alone.
+``baseline_rss_mb`` is the peak after imports, before any analysis.
+Images within ``--max-pixels`` are analysed at full resolution
+(``analysis_scale`` 1.0); larger JPEGs at a reduced DCT scale.
+
+    python backend/benchmarks/image_forensics.py --megapixels 1 4 12 24 50 100
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def write_synthetic_jpeg(path, megapixels, seed=0, quality=90):
+    """A 3:2 JPEG of noisy gradients, built from one tiled patch to keep generation cheap"""
+    width = int(round((megapixels * 1e6 * 1.5) ** 0.5))
+    height = int(round(width / 1.5))
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:512, 0:512]
+    patch = np.stack([x / 2 + 40, y / 2 + 40, (x + y) / 4 + 40], axis=-1) + rng.normal(0, 6, (512, 512, 3))
+    patch = np.clip(patch, 0, 255).astype(np.uint8)
+    pixels = np.tile(patch, (height // 512 + 1, width // 512 + 1, 1))[:height, :width]
+    Image.fromarray(pixels).save(path, format='JPEG', quality=quality)
+    return width, height
+
+
+def peak_rss_mb():
+    # VmHWM starts fresh at exec; ru_maxrss can carry over the parent's peak
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(path, max_pixels):
+    """Runs inside the subprocess"""
+    from models.image_detector import ImageDetector
+
+    detector = ImageDetector(max_pixels=max_pixels, workers=1)
+    with open(path, 'rb') as f:
+        data = f.read()
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    result = detector.detect_manipulation(data)
+    elapsed = time.perf_counter() - start
+    if 'error' in result:
+        raise RuntimeError(result['error'])
+    return {
+        'seconds': round(elapsed, 3),
+        'baseline_rss_mb': round(baseline, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'analysis_scale': result['metadata']['forensics']['analysis_scale'],
+        'tiles': result['metadata']['forensics']['tiles'],
+        'heatmap_bytes': len(result['heatmap']['data'])
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--megapixels', nargs='+', type=float, default=[1, 4, 12, 24, 50, 100])
+    parser.add_argument('--max-pixels', type=int, default=64_000_000, help='full-resolution decode budget')
+    parser.add_argument('--measure', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.max_pixels)))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for megapixels in args.megapixels:
+            path = os.path.join(directory, f'{megapixels}mp.jpg')
+            width, height = write_synthetic_jpeg(path, megapixels)
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), '--measure', path,
+                                     '--max-pixels', str(args.max_pixels)],
+                                    check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            result.update({'resolution': f'{width}x{height}', 'megapixels': megapixels,
+                           'jpeg_mb': round(os.path.getsize(path) / 1e6, 2)})
+            results.append(result)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
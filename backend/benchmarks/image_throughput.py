@@ -0,0 +1,90 @@
+"""Per-image latency and images/sec of ImageDetector by image resolution.
+
+Synthetic JPEGs are generated per resolution. Latency is measured one image
+at a time through detect_manipulation; throughput pushes a whole batch
+through detect_batch so the analysis thread pool is saturated.
+
+    python backend/benchmarks/image_throughput.py --resolutions 640x480 1920x1080 3840x2160
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.image_detector import ImageDetector
+
+
+def synthetic_jpeg(width, height, seed=0, quality=90):
+    """Smooth gradients plus noise, so the JPEG is not trivially compressible"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([x * 255 / width, y * 255 / height, (x + y) * 127 / (width + height)], axis=-1)
+    pixels = np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def percentile(values, q):
+    return float(np.percentile(np.asarray(values), q))
+
+
+def benchmark_resolution(detector, width, height, iterations, batch_size):
+    payloads = [synthetic_jpeg(width, height, seed=i) for i in range(min(batch_size, 8))]
+
+    latencies = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        result = detector.detect_manipulation(payloads[i % len(payloads)])
+        latencies.append((time.perf_counter() - start) * 1000)
+        if 'error' in result:
+            raise RuntimeError(result['error'])
+
+    batch = [payloads[i % len(payloads)] for i in range(batch_size)]
+    start = time.perf_counter()
+    detector.detect_batch(batch)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'resolution': f'{width}x{height}',
+        'megapixels': round(width * height / 1e6, 2),
+        'jpeg_kb': round(sum(len(p) for p in payloads) / len(payloads) / 1024, 1),
+        'latency_ms': {
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'mean': float(np.mean(latencies))
+        },
+        'images_per_second': batch_size / elapsed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--resolutions', nargs='+', default=['640x480', '1280x720', '1920x1080', '3840x2160'])
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    detector = ImageDetector(workers=args.workers)
+    report = {
+        'workers': detector.executor._max_workers,
+        'face_max_dimension': detector.face_max_dimension,
+        'scale_factor': detector.scale_factor,
+        'results': []
+    }
+    for resolution in args.resolutions:
+        width, height = (int(v) for v in resolution.lower().split('x'))
+        report['results'].append(benchmark_resolution(detector, width, height, args.iterations, args.batch_size))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
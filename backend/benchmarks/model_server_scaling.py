@@ -0,0 +1,109 @@
+"""Throughput and memory of the local model server against its worker count.
+
+For each worker count a fresh ``models.model_server`` process tree is
+started, driven by ``--clients`` concurrent client threads for
+``--duration`` seconds, and measured. Memory is the summed PSS (proportional
+set size) of the whole tree, which charges shared weight pages once rather
+than once per worker as RSS does.
+
+    python backend/benchmarks/model_server_scaling.py --workers 1 2 4 --clients 8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.compare_text_backends import SAMPLE_TEXTS
+from models.model_server import ModelServerClient
+
+
+def process_tree(pid):
+    pids = [pid]
+    for child in pids:
+        try:
+            with open(f'/proc/{child}/task/{child}/children') as f:
+                pids.extend(int(p) for p in f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def memory_mb(pid, field):
+    """Sum of a /proc/<pid>/smaps_rollup field (Pss, Rss) over a process tree"""
+    total = 0
+    for child in process_tree(pid):
+        try:
+            with open(f'/proc/{child}/smaps_rollup') as f:
+                for line in f:
+                    if line.startswith(field + ':'):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    return total / 1024
+
+
+def measure(workers, clients, duration, batch_size, backend):
+    socket_path = os.path.join(tempfile.mkdtemp(prefix='truthguard-'), 'model.sock')
+    command = [sys.executable, '-m', 'models.model_server', '--socket', socket_path, '--workers', str(workers)]
+    if backend:
+        command += ['--backend', backend]
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, stdout=subprocess.DEVNULL)
+    try:
+        client = ModelServerClient(socket_path, connect_timeout=300)
+        batch = (SAMPLE_TEXTS * (batch_size // len(SAMPLE_TEXTS) + 1))[:batch_size]
+        # Every worker warms up after fork; wait until all of them answer
+        pids = set()
+        while len(pids) < workers:
+            pids.add(client.info()['pid'])
+
+        completed = []
+        deadline = time.perf_counter() + duration
+
+        def drive():
+            count = 0
+            while time.perf_counter() < deadline:
+                client.detect_batch(batch)
+                count += len(batch)
+            completed.append(count)
+
+        threads = [threading.Thread(target=drive) for _ in range(clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        return {
+            'workers': workers,
+            'texts_per_second': sum(completed) / elapsed,
+            'pss_mb': memory_mb(server.pid, 'Pss'),
+            'rss_mb': memory_mb(server.pid, 'Rss')
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, 2, 4])
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--backend', default=None)
+    args = parser.parse_args()
+
+    results = [measure(workers, args.clients, args.duration, args.batch_size, args.backend)
+               for workers in args.workers]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Analysis speed of the frame-sampled video detector against a synthetic clip.
+
+A clip alternating static shots, pans and hard cuts is written with
+``cv2.VideoWriter`` (mp4v), then analysed with ``VideoDetector``;
+``realtime_factor`` is seconds of video analysed per wall-clock second.
+
+    python backend/benchmarks/video_throughput.py --width 1920 --height 1080 --seconds 10
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def write_synthetic_clip(path, width, height, seconds, fps=30, seed=0):
+    """Repeats a 3 s pattern: 1 s static, 1 s panning, then a cut to a new shot"""
+    rng = np.random.default_rng(seed)
+    scene = cv2.resize(rng.integers(0, 256, (height // 16, (width + fps * 16) // 16, 3), dtype=np.uint8),
+                       (width + fps * 16, height), interpolation=cv2.INTER_CUBIC)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    for index in range(int(seconds * fps)):
+        shot, offset = divmod(index, 3 * fps)
+        pan = min(max(offset - fps, 0), fps) * 16
+        frame = scene[:, pan:pan + width]
+        writer.write(np.ascontiguousarray(255 - frame if shot % 2 else frame))
+    writer.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--sample-interval', type=float, default=0.2)
+    parser.add_argument('--change-threshold', type=float, default=4.0)
+    args = parser.parse_args()
+
+    from models.image_detector import ImageDetector
+    from models.video_detector import VideoDetector
+
+    detector = VideoDetector(ImageDetector(), sample_interval=args.sample_interval,
+                             change_threshold=args.change_threshold)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'clip.mp4')
+        write_synthetic_clip(path, args.width, args.height, args.seconds)
+        result = detector.detect_video(path)
+    if 'error' in result:
+        raise RuntimeError(result['error'])
+    metadata = result['metadata']
+    print(json.dumps({key: metadata[key] for key in ('width', 'height', 'duration_seconds', 'frames_decoded',
+                                                     'frames_analyzed', 'frames_skipped_unchanged',
+                                                     'analysis_ms', 'realtime_factor')}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
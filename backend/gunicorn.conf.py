@@ -0,0 +1,29 @@
+# Pre-fork deployment: run from the backend/ directory with
+#   gunicorn -c gunicorn.conf.py app:app
+# Models are loaded once in the master (TRUTHGUARD_PRELOAD=1) and shared
+# copy-on-write with the workers; each worker then warms up on its own and
+# reports ready on /api/health/ready once it is hot.
+import glob
+import os
+
+os.environ.setdefault('TRUTHGUARD_PRELOAD', '1')
+# Workers publish their counters here so /api/stats covers the whole deployment
+os.environ.setdefault('TRUTHGUARD_STATS_DIR', f'/dev/shm/truthguard-stats-{os.getpid()}')
+
+bind = os.environ.get('TRUTHGUARD_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('TRUTHGUARD_THREADS', 8))
+preload_app = True
+
+
+def on_exit(server):
+    stats_dir = os.environ['TRUTHGUARD_STATS_DIR']
+    for path in glob.glob(os.path.join(stats_dir, '*.json')):
+        os.remove(path)
+    if os.path.isdir(stats_dir):
+        os.rmdir(stats_dir)
+
+
+def post_fork(server, worker):
+    from app import models
+    models.start()
@@ -0,0 +1,199 @@
+import math
+import threading
+from collections import deque
+
+import numpy as np
+
+# Absolute limits (low, high) per metric name, checked on top of z-scores
+DEFAULT_LIMITS = {
+    'stress_level': (None, 0.9),
+    'heart_rate': (40, 140),
+    'eye_strain': (None, 0.95)
+}
+
+
+def ewma_filter(inputs, decay, gain, initial):
+    """``y_t = decay * y_{t-1} + gain * x_t`` over a batch, starting from ``y_{-1} = initial``.
+
+    Unrolled, ``y_t = decay^(t+1) * (initial + gain * sum_{k<=t} decay^-(k+1) x_k)``,
+    a single cumulative sum. Blocks are cut short enough that ``decay^-n``
+    stays far from overflowing.
+    """
+    inputs = np.asarray(inputs, dtype=np.float64)
+    if decay == 0:
+        return gain * inputs
+    out = np.empty(len(inputs))
+    block = max(1, int(math.log(1e-100) / math.log(decay))) if decay < 1 else max(1, len(inputs))
+    for start in range(0, len(inputs), block):
+        chunk = inputs[start:start + block]
+        powers = decay ** np.arange(1, len(chunk) + 1)
+        out[start:start + len(chunk)] = powers * (initial + gain * np.cumsum(chunk / powers))
+        initial = out[start + len(chunk) - 1]
+    return out
+
+
+class StreamingAnomalyDetector:
+    """Rolling EWMA / z-score and burst detection per sensor metric.
+
+    Numeric series keep an exponentially weighted mean and variance
+    (smoothing factor ``alpha``); a reading whose z-score against the state
+    *before* it reaches ``z_threshold`` raises a ``spike`` or ``drop``
+    alert once ``warmup`` readings have been seen, as does one outside the
+    metric's absolute ``limits``. Boolean series named in ``burst_metrics``
+    raise a ``burst`` alert when ``burst_count`` true readings fall within
+    ``burst_window`` seconds; other boolean series are ignored. Each series
+    alerts at most once per ``cooldown`` seconds.
+
+    ``update`` is O(1) per reading. ``update_grouped`` processes a whole
+    batch per series, running the EWMA recurrences as vectorized NumPy
+    (see ``ewma_filter``), and only loops in Python over alert candidates.
+    """
+
+    def __init__(self, alpha=0.05, z_threshold=4.0, warmup=20, burst_window=60, burst_count=3,
+                 burst_metrics=('suspicious_activity',), cooldown=30, limits=None, max_alerts=1000):
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.warmup = warmup
+        self.burst_window = burst_window
+        self.burst_count = burst_count
+        self.burst_metrics = set(burst_metrics)
+        self.cooldown = cooldown
+        self.limits = DEFAULT_LIMITS if limits is None else limits
+        self._state = {}  # (sensor, metric) -> [mean, variance, count, last alert time]
+        self._events = {}  # (sensor, metric) -> deque of recent true-reading times
+        self.recent_alerts = deque(maxlen=max_alerts)
+        self._lock = threading.Lock()
+
+    def update(self, sensor, metric, value, timestamp, is_boolean=False):
+        """Feed one reading; returns the alerts it raised"""
+        with self._lock:
+            if is_boolean:
+                if metric not in self.burst_metrics:
+                    return []
+                return self._update_burst((sensor, metric), np.array([timestamp]) if value else np.empty(0))
+            key = (sensor, metric)
+            state = self._state.get(key)
+            if state is None:
+                self._state[key] = [value, 0.0, 1, -math.inf]
+                return self._emit(key, self._state[key], [self._limit_alert(key, value, timestamp)])
+            mean, variance, count, _ = state
+            zscore = (value - mean) / math.sqrt(variance) if variance > 0 else 0.0
+            delta = value - mean
+            state[0] = mean + self.alpha * delta
+            state[1] = (1 - self.alpha) * (variance + self.alpha * delta * delta)
+            state[2] = count + 1
+            alert = self._zscore_alert(key, value, zscore, mean, count, timestamp) \
+                or self._limit_alert(key, value, timestamp)
+            return self._emit(key, state, [alert])
+
+    def update_grouped(self, grouped):
+        """Feed readings grouped by ``utils.timeseries.group_readings``; returns alerts"""
+        alerts = []
+        with self._lock:
+            for key, (times, values, is_boolean) in grouped.items():
+                times = np.asarray(times, dtype=np.float64)
+                values = np.asarray(values, dtype=np.float64)
+                if is_boolean:
+                    if key[1] not in self.burst_metrics:
+                        continue
+                    alerts.extend(self._update_burst(key, times[values > 0]))
+                else:
+                    alerts.extend(self._update_series(key, times, values))
+        return alerts
+
+    def _update_series(self, key, times, values):
+        state = self._state.get(key)
+        if state is None:
+            state = self._state[key] = [values[0], 0.0, 0, -math.inf]
+        mean0, variance0, count0, _ = state
+        a = self.alpha
+        # mean_t = (1 - a) mean_{t-1} + a x_t
+        means = ewma_filter(values, 1 - a, a, mean0)
+        prior_means = np.concatenate(([mean0], means[:-1]))
+        # var_t = (1 - a) (var_{t-1} + a (x_t - mean_{t-1})^2)
+        deltas = values - prior_means
+        variances = ewma_filter(a * deltas * deltas, 1 - a, 1 - a, variance0)
+        prior_variances = np.concatenate(([variance0], variances[:-1]))
+        counts = count0 + np.arange(len(values))
+        state[0], state[1], state[2] = float(means[-1]), float(variances[-1]), count0 + len(values)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            zscores = np.where(prior_variances > 0, deltas / np.sqrt(prior_variances), 0.0)
+        candidates = (np.abs(zscores) >= self.z_threshold) & (counts >= self.warmup)
+        low, high = self.limits.get(key[1], (None, None))
+        if low is not None:
+            candidates |= values < low
+        if high is not None:
+            candidates |= values > high
+
+        alerts = []
+        for i in np.flatnonzero(candidates):
+            alert = self._zscore_alert(key, values[i], zscores[i], prior_means[i], counts[i], times[i]) \
+                or self._limit_alert(key, values[i], times[i])
+            alerts.extend(self._emit(key, state, [alert]))
+        return alerts
+
+    def _update_burst(self, key, event_times):
+        window = self._events.get(key)
+        if window is None:
+            window = self._events[key] = deque()
+            self._state[key] = [0.0, 0.0, 0, -math.inf]
+        state = self._state[key]
+        if not len(event_times):
+            return []
+        history = np.array(window, dtype=np.float64)
+        times = np.concatenate((history, event_times))
+        # True readings within the window ending at each new event
+        counts = np.arange(len(history), len(times)) + 1 \
+            - np.searchsorted(times, event_times - self.burst_window, side='right')
+        window.extend(event_times.tolist())
+        while window and window[0] <= times[-1] - self.burst_window:
+            window.popleft()
+
+        alerts = []
+        for i in np.flatnonzero(counts >= self.burst_count):
+            alerts.extend(self._emit(key, state, [{
+                'type': 'burst',
+                'sensor': key[0],
+                'metric': key[1],
+                'count': int(counts[i]),
+                'window_seconds': self.burst_window,
+                'timestamp': float(event_times[i])
+            }]))
+        return alerts
+
+    def _zscore_alert(self, key, value, zscore, mean, count, timestamp):
+        if count < self.warmup or abs(zscore) < self.z_threshold:
+            return None
+        return {
+            'type': 'spike' if zscore > 0 else 'drop',
+            'sensor': key[0],
+            'metric': key[1],
+            'value': float(value),
+            'zscore': round(float(zscore), 2),
+            'baseline': float(mean),
+            'timestamp': float(timestamp)
+        }
+
+    def _limit_alert(self, key, value, timestamp):
+        low, high = self.limits.get(key[1], (None, None))
+        if (low is None or value >= low) and (high is None or value <= high):
+            return None
+        return {
+            'type': 'limit',
+            'sensor': key[0],
+            'metric': key[1],
+            'value': float(value),
+            'limits': [low, high],
+            'timestamp': float(timestamp)
+        }
+
+    def _emit(self, key, state, alerts):
+        emitted = []
+        for alert in alerts:
+            if alert is None or alert['timestamp'] - state[3] < self.cooldown:
+                continue
+            state[3] = alert['timestamp']
+            self.recent_alerts.append(alert)
+            emitted.append(alert)
+        return emitted
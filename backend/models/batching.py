@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """Collects concurrent single-item calls into one batched call.
+
+    Callers block in ``submit``; a background worker drains the queue as soon
+    as ``max_batch_size`` items are waiting or the oldest item has waited
+    ``max_wait_ms``, runs ``process_batch`` once and hands each caller its own
+    result.
+
+    ``process_batch`` may also return a ``concurrent.futures.Future`` of the
+    results (e.g. ``TextPipeline.submit``); the worker then goes straight
+    on to collect the next batch while the previous one is still running.
+    """
+
+    def __init__(self, process_batch, max_batch_size=32, max_wait_ms=5, name="micro-batcher", on_batch=None):
+        self.process_batch = process_batch
+        # Optional callback(batch_size, oldest_wait_seconds) for metrics
+        self.on_batch = on_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self._start()
+
+        # Threads do not survive fork: give pre-fork workers their own queue and worker
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._start())
+
+    def _start(self):
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._running = True
+        self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._worker.start()
+
+    def submit(self, item, timeout=None):
+        """Queue one item and block until its batched result is ready"""
+        return self.submit_async(item).result(timeout=timeout)
+
+    def submit_async(self, item):
+        future = Future()
+        with self._cond:
+            if not self._running:
+                raise RuntimeError("Batcher has been stopped")
+            self._queue.append((item, future, time.monotonic()))
+            self._cond.notify()
+        return future
+
+    @property
+    def queue_depth(self):
+        return len(self._queue)
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._worker.join(timeout=5)
+
+    def _next_batch(self):
+        with self._cond:
+            while self._running and not self._queue:
+                self._cond.wait()
+            if not self._queue:
+                return None
+
+            # Hold the batch open until it is full or the oldest item is due
+            deadline = self._queue[0][2] + self.max_wait
+            while self._running and len(self._queue) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            size = min(len(self._queue), self.max_batch_size)
+            return [self._queue.popleft() for _ in range(size)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        items = [item for item, _, _ in batch]
+        if self.on_batch is not None:
+            self.on_batch(len(batch), time.monotonic() - batch[0][2])
+        try:
+            results = self.process_batch(items)
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        if isinstance(results, Future):
+            results.add_done_callback(lambda done: self._complete(batch, done))
+        else:
+            self._deliver(batch, results)
+
+    def _complete(self, batch, done):
+        if done.exception() is not None:
+            self._fail(batch, done.exception())
+        else:
+            self._deliver(batch, done.result())
+
+    def _deliver(self, batch, results):
+        if len(results) != len(batch):
+            self._fail(batch, RuntimeError(f"Batch handler returned {len(results)} results for {len(batch)} items"))
+            return
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+    @staticmethod
+    def _fail(batch, error):
+        for _, future, _ in batch:
+            future.set_exception(error)
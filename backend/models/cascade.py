@@ -0,0 +1,112 @@
+import threading
+
+import numpy as np
+
+from .stylometry import build_result
+
+
+class CascadeTextDetector:
+    """Stylometric first stage; the transformer only sees uncertain texts.
+
+    Texts whose stylometric AI probability is at most ``low`` or at least
+    ``high`` are answered by the first stage (an early exit); the rest are
+    forwarded, as one batch, to ``second_stage``. Results carry a
+    ``cascade`` entry naming the stage that decided and the first-stage
+    probability. ``stats()`` reports the early-exit rate; ``evaluate()``
+    measures what the thresholds cost in agreement (or accuracy, with
+    labels) against running the transformer on everything.
+    """
+
+    def __init__(self, first_stage, second_stage, low=0.2, high=0.8):
+        if not 0 <= low <= high <= 1:
+            raise ValueError("Cascade thresholds need 0 <= low <= high <= 1")
+        self.first_stage = first_stage
+        self.second_stage = second_stage
+        self.low = low
+        self.high = high
+        self.model_version = f"cascade[{low},{high}]:{first_stage.model_version}+{second_stage.model_version}"
+        self._counts = {'early_exit': 0, 'forwarded': 0}
+        self._lock = threading.Lock()
+        print(f"✅ Text cascade ready (early exit outside {low:.2f}-{high:.2f})")
+
+    def detect_text(self, text):
+        return self.detect_batch([text])[0]
+
+    def detect_batch(self, texts):
+        probabilities, features = self.first_stage.probabilities(texts)
+        confident = (probabilities <= self.low) | (probabilities >= self.high)
+        forwarded = np.flatnonzero(~confident)
+        results = [None] * len(texts)
+        for i in np.flatnonzero(confident):
+            results[i] = self._early_result(probabilities[i], features[i])
+        if len(forwarded):
+            for i, result in zip(forwarded, self.second_stage.detect_batch([texts[i] for i in forwarded])):
+                result['cascade'] = {'stage': 'transformer', 'stylometric_probability': float(probabilities[i])}
+                results[i] = result
+        self._count(len(texts) - len(forwarded), len(forwarded))
+        return results
+
+    def detect_long_text(self, text):
+        probabilities, features = self.first_stage.probabilities([text])
+        if probabilities[0] <= self.low or probabilities[0] >= self.high:
+            self._count(1, 0)
+            return self._early_result(probabilities[0], features[0])
+        self._count(0, 1)
+        result = self.second_stage.detect_long_text(text)
+        result['cascade'] = {'stage': 'transformer', 'stylometric_probability': float(probabilities[0])}
+        return result
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        total = counts['early_exit'] + counts['forwarded']
+        counts['early_exit_rate'] = counts['early_exit'] / total if total else 0.0
+        counts['thresholds'] = [self.low, self.high]
+        return counts
+
+    def evaluate(self, texts, labels=None, thresholds=None, batch_size=32):
+        """Compare the cascade with transformer-only scoring on ``texts``.
+
+        Runs both stages on every text, then reports for each (low, high)
+        pair in ``thresholds`` (default: the configured pair) the early-exit
+        rate and how often the cascade's verdict agrees with the
+        transformer's. With ``labels`` (True = AI-generated), accuracy of
+        both is reported too.
+        """
+        stylometric = self.first_stage.probabilities(texts)[0]
+        transformer = []
+        for start in range(0, len(texts), batch_size):
+            results = self.second_stage.detect_batch(texts[start:start + batch_size])
+            transformer.extend(result.get('ai_probability', np.nan) for result in results)
+        transformer = np.array(transformer)
+        labels = None if labels is None else np.asarray(labels, dtype=bool)
+
+        report = {'texts': len(texts), 'settings': []}
+        if labels is not None:
+            report['transformer_accuracy'] = float(np.mean((transformer > 0.5) == labels))
+            report['stylometric_accuracy'] = float(np.mean((stylometric > 0.5) == labels))
+        for low, high in thresholds or [(self.low, self.high)]:
+            early = (stylometric <= low) | (stylometric >= high)
+            cascade = np.where(early, stylometric, transformer)
+            setting = {
+                'low': low,
+                'high': high,
+                'early_exit_rate': float(early.mean()),
+                'agreement_with_transformer': float(np.mean((cascade > 0.5) == (transformer > 0.5))),
+                'early_exit_agreement': float(np.mean((stylometric[early] > 0.5) == (transformer[early] > 0.5)))
+                if early.any() else None
+            }
+            if labels is not None:
+                setting['accuracy'] = float(np.mean((cascade > 0.5) == labels))
+            report['settings'].append(setting)
+        return report
+
+    def _early_result(self, probability, features):
+        result = build_result(float(probability), features, analysis_type='cascade_text_detection')
+        result['cascade'] = {'stage': 'stylometric', 'stylometric_probability': float(probability)}
+        return result
+
+    def _count(self, early, forwarded):
+        with self._lock:
+            self._counts['early_exit'] += early
+            self._counts['forwarded'] += forwarded
@@ -1,55 +1,221 @@
 import cv2
 import numpy as np
 from PIL import Image
+import atexit
 import base64
 import io
+import math
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from utils.tracing import tracer
+from .forensics import TiledForensics, manipulation_probability, quantization_features
+from .image_hash import HammingIndex, phash
+
+FACE_CASCADE_PATH = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+
 class ImageDetector:
-    def __init__(self):
+    model_version = 'opencv-haar-forensics-v2'
+
+    def __init__(self, face_max_dimension=None, scale_factor=None, min_neighbors=5, min_face_size=24,
+                 workers=None, max_pixels=None, tile_size=None):
+        # Forensics run on the full-resolution luminance plane (one byte per
+        # pixel for JPEGs, which skip chroma). JPEGs above this pixel budget are
+        # decoded at the smallest DCT reduction that fits and flagged as
+        # downscaled; other formats can only be decoded whole and are refused.
+        self.max_pixels = max_pixels or int(os.environ.get('TRUTHGUARD_IMAGE_MAX_PIXELS', 64_000_000))
+        self.forensics = TiledForensics(tile_size=tile_size or int(os.environ.get('TRUTHGUARD_FORENSICS_TILE', 64)))
+        # Face detection runs on a grayscale copy no larger than this, with a
+        # detection pyramid stepping by scale_factor between levels
+        self.face_max_dimension = face_max_dimension or int(os.environ.get('TRUTHGUARD_FACE_MAX_DIM', 640))
+        self.scale_factor = scale_factor or float(os.environ.get('TRUTHGUARD_FACE_SCALE_FACTOR', 1.1))
+        self.min_neighbors = min_neighbors
+        self.min_face_size = min_face_size
         try:
-            self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+            self.face_cascade = cv2.CascadeClassifier(FACE_CASCADE_PATH)
+            if self.face_cascade.empty():
+                raise RuntimeError(f"Could not load face cascade from {FACE_CASCADE_PATH}")
             print("✅ Image detection models loaded!")
         except Exception as e:
             print(f"❌ Image detection initialization failed: {e}")
             raise
+
+        # OpenCV releases the GIL, so a thread pool spreads analysis over all cores
+        self.workers = workers or int(os.environ.get('TRUTHGUARD_IMAGE_WORKERS', 0)) or os.cpu_count()
+        self._start_executor()
+        # A forked child (e.g. a job worker) gets a fresh pool; the parent's threads don't survive fork
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._start_executor())
+
+        # Near-duplicate index of perceptual hashes of previously analysed images
+        self.near_duplicate_distance = int(os.environ.get('TRUTHGUARD_PHASH_DISTANCE', 6))
+        self.hash_index_path = os.environ.get('TRUTHGUARD_PHASH_INDEX_PATH')
+        if self.hash_index_path and os.path.exists(self.hash_index_path):
+            self.hash_index = HammingIndex.load(self.hash_index_path, max_distance=self.near_duplicate_distance)
+            print(f"✅ Loaded {len(self.hash_index)} perceptual hashes")
+        else:
+            self.hash_index = HammingIndex(max_distance=self.near_duplicate_distance)
+        if self.hash_index_path:
+            # Saving merges into the file, so every pre-fork worker can save its own additions
+            atexit.register(self.save_hash_index)
         
+    def _start_executor(self):
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='image-analysis')
+        self._local = threading.local()
+
     def detect_manipulation(self, image_data):
-        """Comprehensive image authenticity analysis"""
+        """Comprehensive image authenticity analysis.
+
+        ``image_data`` may be a base64 string or data URL, raw bytes, or a
+        binary file-like object such as an upload stream.
+        """
+        return self.executor.submit(self._analyze, image_data).result()
+
+    def detect_batch(self, images, remember=True):
+        """Analyse many images concurrently on the analysis thread pool.
+
+        With ``remember=False`` (e.g. video frames) the images are neither
+        looked up in nor added to the near-duplicate index.
+        """
+        futures = [self.executor.submit(self._analyze, image_data, remember) for image_data in images]
+        return [future.result() for future in futures]
+
+    def _analyze(self, image_data, remember=True):
+        start = time.perf_counter()
         try:
             image = self._decode_image(image_data)
             if image is None:
                 return {'error': 'Invalid image data'}
-            
-            opencv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-            
-            ai_probability = 0.3  # Simplified for demo
+            width, height = image.info['original_size']
+            if image.width * image.height > self.max_pixels:
+                return {'error': f'Image of {width}x{height} exceeds the {self.max_pixels} pixel limit'}
+            with tracer.span('image.grayscale'):
+                gray = image if image.mode == 'L' else image.convert('L')
+            with tracer.span('image.phash'):
+                image_hash = phash(gray)
+
+            match = self.hash_index.query(image_hash) if remember else None
+            if match is not None:
+                return self._near_duplicate_result(match, image, image_hash, start)
+
+            with tracer.span('image.faces'):
+                faces = self._detect_faces(gray, width)
+
+            with tracer.span('image.forensics'):
+                features, heatmap = self.forensics.analyze(gray, quantization_features(image), gray.width / width)
+            ai_probability, findings = manipulation_probability(features)
             confidence_score = max(ai_probability, 1 - ai_probability)
+            scale_note = '' if features['full_resolution'] else \
+                f" Forensics ran at 1/{round(1 / features['analysis_scale'])} resolution (above the pixel budget)."
             
-            return {
+            result = {
                 'is_ai_generated': ai_probability > 0.5,
                 'ai_probability': ai_probability,
                 'human_probability': 1 - ai_probability,
                 'confidence_score': confidence_score,
-                'explanation': f"Image analysis complete. Detected {'manipulation' if ai_probability > 0.5 else 'authentic content'}.",
+                'explanation': f"Image analysis complete. Detected {'manipulation' if ai_probability > 0.5 else 'authentic content'}"
+                               f"{': ' + '; '.join(findings) if findings else ''}.{scale_note}",
                 'metadata': {
-                    'width': image.width,
-                    'height': image.height,
-                    'mode': image.mode,
-                    'faces_detected': 0
+                    'width': width,
+                    'height': height,
+                    'mode': image.info['original_mode'],
+                    'faces_detected': len(faces),
+                    'faces': faces,
+                    'perceptual_hash': f'{image_hash:016x}',
+                    'forensics': features,
+                    'analysis_ms': round((time.perf_counter() - start) * 1000, 2)
                 },
+                'heatmap': heatmap,
                 'timestamp': datetime.now().isoformat(),
                 'analysis_type': 'image_authenticity'
             }
+            if remember:
+                self.hash_index.add(image_hash, ai_probability, result['is_ai_generated'])
+            return result
             
         except Exception as e:
             return {'error': f'Image analysis failed: {str(e)}'}
     
+    def save_hash_index(self, path=None):
+        path = path or self.hash_index_path
+        if path:
+            self.hash_index.save(path)
+
+    def _near_duplicate_result(self, match, image, image_hash, start):
+        """Reuse the verdict of a previously analysed, perceptually identical image"""
+        _, prior_hash, distance, ai_probability, is_ai_generated = match
+        width, height = image.info['original_size']
+        return {
+            'is_ai_generated': is_ai_generated,
+            'ai_probability': ai_probability,
+            'human_probability': 1 - ai_probability,
+            'confidence_score': max(ai_probability, 1 - ai_probability),
+            'explanation': f"Near-duplicate of a previously analysed image ({distance} bits apart); "
+                           f"reusing its verdict: {'manipulation' if is_ai_generated else 'authentic content'}.",
+            'metadata': {
+                'width': width,
+                'height': height,
+                'mode': image.info['original_mode'],
+                'perceptual_hash': f'{image_hash:016x}',
+                'analysis_ms': round((time.perf_counter() - start) * 1000, 2)
+            },
+            'near_duplicate_of': {'perceptual_hash': f'{prior_hash:016x}', 'distance': distance},
+            'timestamp': datetime.now().isoformat(),
+            'analysis_type': 'image_authenticity'
+        }
+
+    def _detect_faces(self, gray, original_width):
+        """Run the Haar cascade on a bounded-size grayscale downscale.
+
+        Returns face boxes as [x, y, w, h] in original image coordinates.
+        """
+        factor = math.ceil(max(gray.size) / self.face_max_dimension)
+        if factor > 1:
+            gray = gray.reduce(factor)
+        pixels = cv2.equalizeHist(np.asarray(gray))
+
+        boxes = self._cascade().detectMultiScale(
+            pixels,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=(self.min_face_size, self.min_face_size)
+        )
+        scale = original_width / gray.width
+        return [[int(round(v * scale)) for v in box] for box in boxes]
+
+    def _cascade(self):
+        # CascadeClassifier is not safe to share between threads; keep one per worker
+        cascade = getattr(self._local, 'cascade', None)
+        if cascade is None:
+            cascade = self._local.cascade = cv2.CascadeClassifier(FACE_CASCADE_PATH)
+        return cascade
+
     def _decode_image(self, image_data):
+        """Open an image lazily; only the header is read until pixels are needed"""
         try:
-            if isinstance(image_data, str) and image_data.startswith('data:image'):
-                image_data = image_data.split(',')[1]
-            image_bytes = base64.b64decode(image_data)
-            return Image.open(io.BytesIO(image_bytes))
+            if isinstance(image_data, Image.Image):
+                image = image_data
+            else:
+                if isinstance(image_data, str):
+                    with tracer.span('image.base64_decode'):
+                        image_data = base64.b64decode(image_data.partition(',')[2] if image_data.startswith('data:') else image_data)
+                if isinstance(image_data, (bytes, bytearray, memoryview)):
+                    image_data = io.BytesIO(image_data)
+                with tracer.span('image.open'):
+                    image = Image.open(image_data)
+            image.info.setdefault('original_size', image.size)
+            image.info.setdefault('original_mode', image.mode)
+            if image.format == 'JPEG':
+                # Only the luminance plane is needed, so libjpeg skips chroma and
+                # color conversion; over the pixel budget it also decodes straight
+                # to a 1/2, 1/4 or 1/8 DCT scale instead of resizing afterwards
+                reduction = next((r for r in (1, 2, 4, 8)
+                                  if (image.width // r) * (image.height // r) <= self.max_pixels), 8)
+                image.draft('L', (image.width // reduction, image.height // reduction))
+            return image
         except Exception:
             return None
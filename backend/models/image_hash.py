@@ -0,0 +1,188 @@
+import fcntl
+import os
+import threading
+from array import array
+
+import numpy as np
+from PIL import Image
+
+HASH_BITS = 64
+_M1 = np.uint64(0x5555555555555555)
+_M2 = np.uint64(0x3333333333333333)
+_M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+_H01 = np.uint64(0x0101010101010101)
+
+
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+_DCT32 = _dct_matrix(32)
+
+
+def phash(image):
+    """64-bit DCT perceptual hash of a PIL image"""
+    gray = image if image.mode == 'L' else image.convert('L')
+    pixels = np.asarray(gray.resize((32, 32), Image.Resampling.BOX), dtype=np.float64)
+    low = (_DCT32 @ pixels @ _DCT32.T)[:8, :8].ravel()
+    bits = low > np.median(low[1:])
+    return _pack_bits(bits)
+
+
+def dhash(image):
+    """64-bit gradient (difference) hash of a PIL image"""
+    pixels = np.asarray(image.convert('L').resize((9, 8), Image.Resampling.BOX), dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return _pack_bits(bits)
+
+
+def _pack_bits(bits):
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def popcount64(values):
+    """Vectorized bit count of a uint64 array"""
+    values = values - ((values >> np.uint64(1)) & _M1)
+    values = (values & _M2) + ((values >> np.uint64(2)) & _M2)
+    values = (values + (values >> np.uint64(4))) & _M4
+    return (values * _H01) >> np.uint64(56)
+
+
+class HammingIndex:
+    """Multi-index hashing over 64-bit perceptual hashes.
+
+    Each hash is split into ``max_distance + 1`` bit segments. Two hashes
+    within ``max_distance`` bits must agree exactly on at least one segment
+    (pigeonhole), so a lookup only compares against entries sharing a
+    segment value, found by binary search in per-segment sorted arrays.
+    New entries go to a small unsorted tail that is scanned directly and
+    merged into the sorted arrays as it grows.
+
+    Each hash keeps only a compact verdict (AI probability and flag), about
+    13 bytes, plus 6 bytes per segment of sorted index. Smaller
+    ``max_distance`` means longer segments and fewer candidates per lookup;
+    at the default of 6, millions of hashes stay well under a millisecond
+    per query and about 60 bytes each.
+    """
+
+    def __init__(self, max_distance=6):
+        self.max_distance = max_distance
+        segments = min(max_distance + 1, HASH_BITS)
+        bounds = np.linspace(0, HASH_BITS, segments + 1).astype(int)
+        self._segments = [(int(lo), int(hi - lo)) for lo, hi in zip(bounds[:-1], bounds[1:])]
+        self._segment_dtype = np.uint16 if max(width for _, width in self._segments) <= 16 else np.uint64
+        self._hashes = array('Q')
+        self._probabilities = array('f')
+        self._flags = array('b')
+        self._sorted_values = [np.empty(0, dtype=self._segment_dtype) for _ in self._segments]
+        self._sorted_ids = [np.empty(0, dtype=np.int32) for _ in self._segments]
+        self._merged = 0
+        self._saved = 0  # entries before this index are already in the index file
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def add(self, image_hash, ai_probability, is_ai_generated):
+        """Store a hash with its verdict; returns its ID"""
+        with self._lock:
+            self._hashes.append(image_hash)
+            self._probabilities.append(ai_probability)
+            self._flags.append(bool(is_ai_generated))
+            if len(self._hashes) - self._merged > max(1024, self._merged // 8):
+                self._merge()
+            return len(self._hashes) - 1
+
+    def query(self, image_hash, max_distance=None):
+        """Return (id, hash, distance, ai_probability, is_ai_generated) of the closest entry, or None"""
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        with self._lock:
+            if not self._hashes:
+                return None
+            hashes = np.frombuffer(self._hashes, dtype=np.uint64)
+            query = np.uint64(image_hash)
+
+            candidates = [np.arange(self._merged, len(hashes), dtype=np.int64)]
+            for k, (shift, width) in enumerate(self._segments):
+                value = self._segment(query, shift, width).astype(self._segment_dtype)
+                values = self._sorted_values[k]
+                lo = np.searchsorted(values, value, side='left')
+                hi = np.searchsorted(values, value, side='right')
+                if hi > lo:
+                    candidates.append(self._sorted_ids[k][lo:hi])
+            ids = np.concatenate(candidates)
+            if not len(ids):
+                return None
+
+            distances = popcount64(hashes[ids] ^ query)
+            best = int(np.argmin(distances))
+            distance = int(distances[best])
+            if distance > max_distance:
+                return None
+            entry_id = int(ids[best])
+            return (entry_id, int(hashes[entry_id]), distance,
+                    float(self._probabilities[entry_id]), bool(self._flags[entry_id]))
+
+    def save(self, path):
+        """Add this index's unsaved entries to the index file at ``path``.
+
+        Processes sharing one file (e.g. pre-fork workers) each append their
+        own new hashes under an exclusive lock, skipping hashes the file
+        already holds, instead of the last one to exit overwriting the rest.
+        """
+        with open(path + '.lock', 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            with self._lock:
+                end = len(self._hashes)
+                hashes = np.frombuffer(self._hashes, dtype=np.uint64)[self._saved:end].copy()
+                probabilities = np.frombuffer(self._probabilities, dtype=np.float32)[self._saved:end].copy()
+                flags = np.frombuffer(self._flags, dtype=np.int8)[self._saved:end].copy()
+            if os.path.exists(path):
+                saved = self._read(path)
+                new = ~np.isin(hashes, saved[0])
+                hashes, probabilities, flags = (np.concatenate((old, current[new]))
+                                                for old, current in zip(saved, (hashes, probabilities, flags)))
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, hashes=hashes, probabilities=probabilities, flags=flags,
+                         max_distance=self.max_distance)
+            os.replace(tmp_path, path)
+            self._saved = max(self._saved, end)
+
+    @classmethod
+    def load(cls, path, max_distance=None):
+        with np.load(path) as data:
+            stored_distance = int(data['max_distance'])
+        index = cls(max_distance=stored_distance if max_distance is None else max_distance)
+        hashes, probabilities, flags = cls._read(path)
+        index._hashes.frombytes(hashes.tobytes())
+        index._probabilities.frombytes(probabilities.tobytes())
+        index._flags.frombytes(flags.tobytes())
+        index._saved = len(index._hashes)
+        with index._lock:
+            index._merge()
+        return index
+
+    @staticmethod
+    def _read(path):
+        """(hashes, probabilities, flags) arrays of an index file"""
+        with np.load(path) as data:
+            return (data['hashes'].astype(np.uint64), data['probabilities'].astype(np.float32),
+                    data['flags'].astype(np.int8))
+
+    @staticmethod
+    def _segment(values, shift, width):
+        return (values >> np.uint64(shift)) & np.uint64((1 << width) - 1)
+
+    def _merge(self):
+        """Rebuild the per-segment sorted arrays to include the unsorted tail"""
+        hashes = np.frombuffer(self._hashes, dtype=np.uint64)
+        for k, (shift, width) in enumerate(self._segments):
+            values = self._segment(hashes, shift, width).astype(self._segment_dtype)
+            order = np.argsort(values, kind='stable')
+            self._sorted_values[k] = values[order]
+            self._sorted_ids[k] = order.astype(np.int32)
+        self._merged = len(hashes)
@@ -0,0 +1,280 @@
+"""Local model server: one copy of the text model, several pinned workers.
+
+The parent process loads the RoBERTa detector once, moves its weights into
+shared memory and forks ``--workers`` inference processes, each pinned to
+its own set of cores with torch's thread pool sized to match. With the
+ONNX backend only the export is shared: ONNX Runtime sessions are not
+fork-safe, so each worker builds its own session (and intra-op pool) after
+the fork, at the cost of one copy of the weights per worker. Workers
+accept connections on one shared Unix socket (the kernel hands each
+connection to an idle worker); every connection carries one
+length-prefixed JSON request and its response. HTTP workers talk to it
+through ``ModelServerClient`` (TRUTHGUARD_MODEL_SERVER=<socket path>).
+
+Run from the backend/ directory:
+
+    python -m models.model_server --socket /tmp/truthguard-model.sock --workers 4
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import struct
+import threading
+import time
+import weakref
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+_HEADER = struct.Struct('>I')
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+WARMUP_TEXT = "Artificial intelligence has revolutionized numerous industries by automating complex processes."
+
+RemoteBackend = namedtuple('RemoteBackend', 'name')
+
+
+def send_message(conn, message):
+    data = json.dumps(message).encode('utf-8')
+    conn.sendall(_HEADER.pack(len(data)) + data)
+
+
+def recv_message(conn):
+    size = _HEADER.unpack(_recv_exactly(conn, _HEADER.size))[0]
+    if size > MAX_MESSAGE_BYTES:
+        raise ValueError(f"Message of {size} bytes exceeds {MAX_MESSAGE_BYTES}")
+    return json.loads(_recv_exactly(conn, size))
+
+
+def _recv_exactly(conn, size):
+    chunks = []
+    while size:
+        chunk = conn.recv(min(size, 1024 * 1024))
+        if not chunk:
+            raise ConnectionError("Connection closed mid-message")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def core_sets(workers, cores_per_worker=None, available=None):
+    """Split the cores this process may run on into disjoint per-worker sets"""
+    available = sorted(available if available is not None else os.sched_getaffinity(0))
+    per_worker = cores_per_worker or max(1, len(available) // workers)
+    if workers * per_worker > len(available):
+        print(f"⚠️ {workers} workers x {per_worker} cores exceeds {len(available)} cores; sets will overlap")
+    return [[available[(index * per_worker + offset) % len(available)] for offset in range(per_worker)]
+            for index in range(workers)]
+
+
+class ModelServer:
+    """Parent process: owns the listening socket, the weights and the workers"""
+
+    def __init__(self, socket_path, workers=2, cores_per_worker=None, backend=None):
+        self.socket_path = socket_path
+        self.workers = workers
+        self.cores = core_sets(workers, cores_per_worker)
+        self.backend = backend
+        self.detector = None
+        self.listener = None
+        self._processes = [None] * workers
+        self._running = False
+
+    def load(self):
+        from .text_detector import EnhancedTextDetector
+
+        self.detector = EnhancedTextDetector(backend=self.backend)
+        model = getattr(self.detector.backend, 'model', None)
+        if model is not None:
+            # Tensor storage moves to shared memory: workers map the same
+            # pages instead of relying on copy-on-write
+            model.share_memory()
+        # Keep the collector in forked workers off the parent's objects
+        gc.collect()
+        gc.freeze()
+
+    def serve_forever(self):
+        if self.detector is None:
+            self.load()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(self.socket_path)
+        self.listener.listen(128)
+        print(f"🧠 Model server listening on {self.socket_path} with {self.workers} workers")
+
+        self._running = True
+        signal.signal(signal.SIGTERM, lambda *args: self.stop())
+        try:
+            while self._running:
+                # Fork (and re-fork crashed) workers; the parent itself never runs inference,
+                # so no OpenMP thread pool exists yet at fork time
+                for index, process in enumerate(self._processes):
+                    if process is None or not process.is_alive():
+                        if process is not None:
+                            print(f"⚠️ Model worker {index} exited ({process.exitcode}); restarting")
+                        self._processes[index] = self._spawn(index)
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._running = False
+        for process in self._processes:
+            if process is not None and process.is_alive():
+                process.terminate()
+        for process in self._processes:
+            if process is not None:
+                process.join(timeout=5)
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def _spawn(self, index):
+        context = multiprocessing.get_context('fork')
+        process = context.Process(target=_worker_main,
+                                  args=(self.listener, self.detector, self.cores[index], index, self.workers),
+                                  name=f'model-worker-{index}', daemon=True)
+        process.start()
+        return process
+
+
+def _worker_main(listener, detector, cores, index, workers):
+    import torch
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent shuts workers down
+    os.sched_setaffinity(0, cores)
+    torch.set_num_threads(len(cores))
+    if hasattr(detector.backend, 'num_threads'):
+        # ONNX Runtime sizes its own intra-op pool when the warm-up builds the session
+        detector.backend.num_threads = len(cores)
+    detector.detect_batch([WARMUP_TEXT])
+    print(f"✅ Model worker {index} (pid {os.getpid()}) ready on cores {cores}")
+
+    info = {'model_version': detector.model_version, 'backend': detector.backend.name, 'workers': workers}
+    while True:
+        conn, _ = listener.accept()
+        with conn:
+            try:
+                request = recv_message(conn)
+                send_message(conn, _handle(detector, request, info))
+            except (OSError, ValueError) as e:
+                print(f"Model worker {index}: dropped request: {e}")
+
+
+def _handle(detector, request, info):
+    if not isinstance(request, dict):
+        return {'error': 'Request must be a JSON object'}
+    try:
+        op = request.get('op')
+        if op == 'detect_batch':
+            return {'results': detector.detect_batch(request['texts'])}
+        if op == 'detect_long_text':
+            return {'result': detector.detect_long_text(request['text'])}
+        if op == 'info':
+            return dict(info, pid=os.getpid())
+        return {'error': f"Unknown op '{op}'"}
+    except Exception as e:
+        return {'error': f'Detection failed: {str(e)}'}
+
+
+class ModelServerClient:
+    """Text detector that forwards every call to a local ``ModelServer``.
+
+    Each call uses its own short-lived Unix socket connection, so any
+    number of threads and forked processes can share one client.
+    Construction waits up to ``connect_timeout`` seconds for the server.
+
+    ``submit`` sends a batch without waiting for it, so a single batching
+    thread can keep up to ``concurrency`` batches in flight (by default one
+    per server worker) instead of using one server worker at a time.
+    """
+
+    def __init__(self, socket_path, timeout=60, connect_timeout=120, concurrency=None):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        deadline = time.monotonic() + connect_timeout
+        while True:
+            try:
+                info = self.info()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.5)
+        self.model_version = info['model_version']
+        self.backend = RemoteBackend(f"{info['backend']}@model-server")
+        self.concurrency = concurrency or info.get('workers', 1)
+        self._start_pool()
+        # Threads do not survive fork: pre-fork HTTP workers get their own pool
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._start_pool())
+        print(f"✅ Connected to model server at {socket_path} ({self.model_version})")
+
+    def _start_pool(self):
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='model-server-client')
+
+    def submit(self, texts):
+        """Send one batch; returns a Future of its results.
+
+        Blocks while ``concurrency`` batches are already in flight, so the
+        caller's batcher keeps filling the next batch meanwhile.
+        """
+        self._slots.acquire()
+        future = self._pool.submit(self.detect_batch, list(texts))
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def info(self):
+        """Model version, backend and pid of whichever worker answers"""
+        return self._call({'op': 'info'})
+
+    def detect_text(self, text):
+        return self.detect_batch([text])[0]
+
+    def detect_batch(self, texts):
+        try:
+            response = self._call({'op': 'detect_batch', 'texts': list(texts)})
+        except (OSError, ValueError) as e:
+            response = {'error': f'Model server unavailable: {str(e)}'}
+        if 'error' in response:
+            return [{'error': response['error']} for _ in texts]
+        return response['results']
+
+    def detect_long_text(self, text):
+        try:
+            response = self._call({'op': 'detect_long_text', 'text': text})
+        except (OSError, ValueError) as e:
+            return {'error': f'Model server unavailable: {str(e)}'}
+        return response.get('result') or {'error': response['error']}
+
+    def _call(self, request):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.settimeout(self.timeout)
+            conn.connect(self.socket_path)
+            send_message(conn, request)
+            return recv_message(conn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TruthGuard local text model server")
+    parser.add_argument('--socket', default=os.environ.get('TRUTHGUARD_MODEL_SERVER', '/tmp/truthguard-model.sock'))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('TRUTHGUARD_MODEL_WORKERS', 2)))
+    parser.add_argument('--cores-per-worker', type=int, default=None,
+                        help='defaults to an even split of the available cores')
+    parser.add_argument('--backend', default=None, help='text backend: torch, torch-int8 or onnx')
+    args = parser.parse_args()
+    ModelServer(args.socket, workers=args.workers, cores_per_worker=args.cores_per_worker,
+                backend=args.backend).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+import os
+import queue
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import Future
+
+_STOP = object()
+
+
+class _StageClock:
+    """Busy time of a stage's workers over a sliding window, for utilization"""
+
+    def __init__(self, workers, window=10.0):
+        self.workers = workers
+        self.window = window
+        self.batches = 0
+        self._intervals = deque()  # (start, end) of finished work
+        self._active = {}  # worker thread id -> start of current work
+        self._lock = threading.Lock()
+
+    def begin(self):
+        with self._lock:
+            self._active[threading.get_ident()] = time.monotonic()
+
+    def end(self):
+        now = time.monotonic()
+        with self._lock:
+            self._intervals.append((self._active.pop(threading.get_ident()), now))
+            self.batches += 1
+            while self._intervals and self._intervals[0][1] <= now - self.window:
+                self._intervals.popleft()
+
+    def utilization(self):
+        now = time.monotonic()
+        since = now - self.window
+        with self._lock:
+            busy = sum(end - max(start, since) for start, end in self._intervals if end > since)
+            busy += sum(now - max(start, since) for start in self._active.values())
+        return busy / (self.window * self.workers)
+
+
+class TextPipeline:
+    """Tokenization and inference as two overlapping stages.
+
+    ``tokenizer_workers`` threads call ``detector.tokenize`` (the fast
+    tokenizer's batch mode, which runs outside the GIL) and hand the
+    tensors over a queue bounded at ``queue_size`` batches to one model
+    thread calling ``detector.score``. While the model thread is in a
+    forward pass the next batches are already being tokenized; when the
+    model falls behind, the bounded queue pushes back on the tokenizers and
+    from there on ``submit``.
+
+    The model thread applies ``num_threads`` (intra-op) and
+    ``interop_threads`` to torch before its first batch. ``stats`` reports
+    each stage's queue depth and the share of its workers' time spent busy
+    over the last ``window`` seconds.
+    """
+
+    def __init__(self, detector, tokenizer_workers=2, queue_size=2, num_threads=None, interop_threads=None,
+                 window=10.0, name='text-pipeline'):
+        self.detector = detector
+        self.tokenizer_workers = tokenizer_workers
+        self.queue_size = queue_size
+        self.num_threads = num_threads
+        self.interop_threads = interop_threads
+        self.window = window
+        self.name = name
+        self._start()
+
+        # Threads do not survive fork: give pre-fork workers their own stages
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._start())
+
+    def _start(self):
+        self._pending = queue.Queue(maxsize=self.tokenizer_workers * 2)
+        self._tokenized = queue.Queue(maxsize=self.queue_size)
+        self._tokenizer_clock = _StageClock(self.tokenizer_workers, self.window)
+        self._model_clock = _StageClock(1, self.window)
+        self._threads = [threading.Thread(target=self._tokenize_loop, name=f'{self.name}-tokenizer-{i}', daemon=True)
+                         for i in range(self.tokenizer_workers)]
+        self._threads.append(threading.Thread(target=self._model_loop, name=f'{self.name}-model', daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, texts):
+        """Queue one batch; returns a Future of its results.
+
+        Blocks while the tokenizer stage already has a full backlog.
+        """
+        future = Future()
+        self._pending.put((list(texts), future))
+        return future
+
+    def detect_batch(self, texts):
+        return self.submit(texts).result()
+
+    def stats(self):
+        return {
+            'tokenizer': {
+                'workers': self.tokenizer_workers,
+                'queue_depth': self._pending.qsize(),
+                'utilization': self._tokenizer_clock.utilization(),
+                'batches': self._tokenizer_clock.batches
+            },
+            'model': {
+                'workers': 1,
+                'queue_depth': self._tokenized.qsize(),
+                'utilization': self._model_clock.utilization(),
+                'batches': self._model_clock.batches
+            }
+        }
+
+    def stop(self):
+        for _ in range(self.tokenizer_workers):
+            self._pending.put(_STOP)
+        for thread in self._threads[:-1]:
+            thread.join(timeout=5)
+        self._tokenized.put(_STOP)
+        self._threads[-1].join(timeout=5)
+
+    def _tokenize_loop(self):
+        while True:
+            item = self._pending.get()
+            if item is _STOP:
+                return
+            texts, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            self._tokenizer_clock.begin()
+            try:
+                inputs = self.detector.tokenize(texts)
+            except Exception as e:
+                future.set_result([{'error': f'Detection failed: {str(e)}'} for _ in texts])
+                continue
+            finally:
+                self._tokenizer_clock.end()
+            self._tokenized.put((texts, inputs, future))
+
+    def _model_loop(self):
+        self._configure_threads()
+        while True:
+            item = self._tokenized.get()
+            if item is _STOP:
+                return
+            texts, inputs, future = item
+            self._model_clock.begin()
+            try:
+                future.set_result(self.detector.score(texts, inputs))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self._model_clock.end()
+
+    def _configure_threads(self):
+        import torch
+
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+        if self.interop_threads:
+            try:
+                torch.set_num_interop_threads(self.interop_threads)
+            except RuntimeError as e:
+                # Only allowed once, before any inter-op parallel work has started
+                print(f"⚠️ Could not set torch inter-op threads: {e}")
@@ -0,0 +1,125 @@
+import gc
+import os
+import threading
+import time
+
+
+class ModelNotReady(RuntimeError):
+    pass
+
+
+class ModelRegistry:
+    """Loads detectors off the request path and tracks readiness.
+
+    ``factories`` maps a name to a zero-argument constructor; heavy imports
+    (torch, transformers, cv2) belong inside the factory so importing the
+    app stays cheap. ``warmups`` maps a name to a callable run on the loaded
+    detector before the registry reports ready. ``on_loaded`` callables get
+    the detectors dict after loading and before warm-up, while this process
+    has not yet run any inference (the safe point to fork helper processes).
+
+    ``start()`` loads and warms up in a background thread. For pre-fork
+    servers call ``preload()`` in the master before forking: weights are
+    loaded once and shared copy-on-write, and each worker then runs only
+    the warm-up via ``start()``.
+
+    After a failure the next ``start()`` retries, no sooner than
+    ``retry_backoff`` seconds later, doubling per failure up to
+    ``max_retry_backoff``.
+    """
+
+    def __init__(self, factories, warmups=None, on_loaded=None, retry_backoff=5.0, max_retry_backoff=300.0):
+        self.factories = factories
+        self.warmups = warmups or {}
+        self.on_loaded = on_loaded or []
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self.detectors = {}
+        self.state = 'pending'
+        self.error = None
+        self.timings = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread = None
+        self._pid = os.getpid()
+        self._callbacks_run = False
+        self._failures = 0
+        self._retry_at = 0.0
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def get(self, name):
+        if not self._ready.is_set():
+            raise ModelNotReady(f"Models are {self.state}")
+        return self.detectors[name]
+
+    def preload(self):
+        """Load every detector synchronously, leaving warm-up to the workers"""
+        self._load()
+        # Move surviving objects out of the collector's generations so GC
+        # passes in forked workers don't touch (and un-share) their pages
+        gc.collect()
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+
+    def start(self):
+        """Load (if needed) and warm up in a background thread"""
+        with self._lock:
+            if self._pid != os.getpid():
+                # Inherited from a preloading parent: only the thread is stale
+                self._pid = os.getpid()
+                self._thread = None
+            if self._thread is not None or time.monotonic() < self._retry_at:
+                return
+            self._thread = threading.Thread(target=self._run, name='model-loader', daemon=True)
+            self._thread.start()
+
+    def wait(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def status(self):
+        return {
+            'state': self.state,
+            'ready': self.ready,
+            'models': sorted(self.detectors),
+            'timings_seconds': dict(self.timings),
+            'error': self.error
+        }
+
+    def _run(self):
+        try:
+            self._load()
+            if not self._callbacks_run:
+                for callback in self.on_loaded:
+                    callback(self.detectors)
+                self._callbacks_run = True
+            self.state = 'warming'
+            for name, warmup in self.warmups.items():
+                start = time.perf_counter()
+                warmup(self.detectors[name])
+                self.timings[f'{name}_warmup'] = time.perf_counter() - start
+            self.state = 'ready'
+            self.error = None
+            self._ready.set()
+            print("✅ All AI models loaded and warmed up!")
+        except Exception as e:
+            with self._lock:
+                self.state = 'failed'
+                self.error = str(e)
+                self._failures += 1
+                backoff = min(self.max_retry_backoff, self.retry_backoff * 2 ** (self._failures - 1))
+                self._retry_at = time.monotonic() + backoff
+                self._thread = None  # the next start() retries
+            print(f"❌ Model loading failed (retrying in {backoff:.1f}s): {e}")
+
+    def _load(self):
+        self.state = 'loading'
+        for name, factory in self.factories.items():
+            if name in self.detectors:
+                continue
+            start = time.perf_counter()
+            self.detectors[name] = factory()
+            self.timings[f'{name}_load'] = time.perf_counter() - start
+        self.state = 'loaded'
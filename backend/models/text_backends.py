@@ -0,0 +1,117 @@
+import os
+import threading
+import weakref
+
+import torch
+
+BACKENDS = ('torch', 'torch-int8', 'onnx')
+DEFAULT_ONNX_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'truthguard', 'onnx')
+
+
+def load_backend(name, model, model_name, num_threads=None):
+    """Wrap a loaded fp32 sequence-classification model in the requested backend"""
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    if name == 'torch':
+        return TorchBackend(model)
+    if name == 'torch-int8':
+        return QuantizedTorchBackend(model)
+    if name == 'onnx':
+        return OnnxBackend(model, model_name, num_threads=num_threads)
+    raise ValueError(f"Unknown text backend '{name}', expected one of {', '.join(BACKENDS)}")
+
+
+class TorchBackend:
+    """PyTorch eager fp32 inference"""
+    name = 'torch'
+
+    def __init__(self, model):
+        self.model = model.eval()
+
+    def logits(self, input_ids, attention_mask):
+        with torch.no_grad():
+            return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """PyTorch eager inference with Linear layers dynamically quantized to int8"""
+    name = 'torch-int8'
+
+    def __init__(self, model):
+        quantized = torch.quantization.quantize_dynamic(model.eval(), {torch.nn.Linear}, dtype=torch.qint8)
+        super().__init__(quantized)
+
+
+class OnnxBackend:
+    """ONNX Runtime CPU inference on an export of the same checkpoint.
+
+    The export is cached under TRUTHGUARD_ONNX_DIR and reused across
+    restarts; the fp32 torch model is only needed for the first export.
+
+    ONNX Runtime sessions are not fork-safe, so the session is built on
+    first use in the process that runs inference and dropped in forked
+    children. ``num_threads`` (the intra-op pool size) may be changed until
+    then, e.g. by a model server worker after pinning itself to its cores.
+    """
+    name = 'onnx'
+
+    def __init__(self, model, model_name, num_threads=None, onnx_dir=None):
+        import onnxruntime as ort
+
+        onnx_dir = onnx_dir or os.environ.get('TRUTHGUARD_ONNX_DIR', DEFAULT_ONNX_DIR)
+        self.path = os.path.join(onnx_dir, model_name.replace('/', '__') + '.onnx')
+        if not os.path.exists(self.path):
+            os.makedirs(onnx_dir, exist_ok=True)
+            self._export(model, self.path)
+
+        self.num_threads = num_threads
+        self._session = None
+        self._lock = threading.Lock()
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._reset_after_fork())
+
+    @property
+    def session(self):
+        if self._session is None:
+            import onnxruntime as ort
+
+            with self._lock:
+                if self._session is None:
+                    options = ort.SessionOptions()
+                    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                    if self.num_threads:
+                        options.intra_op_num_threads = self.num_threads
+                    self._session = ort.InferenceSession(self.path, options, providers=['CPUExecutionProvider'])
+        return self._session
+
+    def _reset_after_fork(self):
+        self._session = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _export(model, path):
+        print(f"📦 Exporting text model to ONNX: {path}")
+        dummy = torch.ones((1, 8), dtype=torch.long)
+        tmp_path = path + '.tmp'
+        with torch.no_grad():
+            torch.onnx.export(
+                model.eval(),
+                (dummy, dummy),
+                tmp_path,
+                input_names=['input_ids', 'attention_mask'],
+                output_names=['logits'],
+                dynamic_axes={
+                    'input_ids': {0: 'batch', 1: 'sequence'},
+                    'attention_mask': {0: 'batch', 1: 'sequence'},
+                    'logits': {0: 'batch'}
+                },
+                opset_version=14
+            )
+        os.replace(tmp_path, path)
+
+    def logits(self, input_ids, attention_mask):
+        outputs = self.session.run(['logits'], {
+            'input_ids': input_ids.numpy(),
+            'attention_mask': attention_mask.numpy()
+        })
+        return torch.from_numpy(outputs[0])
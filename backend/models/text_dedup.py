@@ -0,0 +1,126 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+_MASK32 = np.uint64(0xFFFFFFFF)
+
+
+class MinHashLSHIndex:
+    """Near-duplicate lookup for texts via shingling, MinHash and LSH banding.
+
+    Texts are normalized and split into byte shingles of ``shingle_size``
+    (at most 8, so each shingle packs losslessly into a uint64). The MinHash
+    signature applies ``num_perm`` multiply-shift hash functions to all
+    shingles in one NumPy operation. Signatures are split into ``bands``
+    bands; texts sharing any band bucket are candidates, and the best
+    candidate is accepted when its estimated Jaccard similarity (fraction of
+    equal signature slots) reaches ``threshold``.
+
+    Each entry keeps only its signature, cluster ID and verdict (AI
+    probability and flag). At most ``max_entries`` texts are kept; the least
+    recently matched ones are evicted first.
+    """
+
+    def __init__(self, num_perm=128, bands=16, threshold=0.8, shingle_size=5, max_entries=100000, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        if not 1 <= shingle_size <= 8:
+            raise ValueError("shingle_size must be between 1 and 8")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.max_entries = max_entries
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, np.iinfo(np.uint64).max, num_perm, dtype=np.uint64, endpoint=True) | np.uint64(1)
+        self._b = rng.integers(0, np.iinfo(np.uint64).max, num_perm, dtype=np.uint64, endpoint=True)
+
+        self._entries = OrderedDict()  # entry_id -> (signature, cluster_id, ai_probability, is_ai_generated)
+        self._buckets = [{} for _ in range(bands)]  # band bytes -> set of entry ids
+        self._next_id = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def shingles(self, text):
+        data = ' '.join(text.lower().split()).encode('utf-8')
+        k = self.shingle_size
+        if len(data) <= k:
+            return np.array([int.from_bytes(data, 'little')], dtype=np.uint64)
+        raw = np.frombuffer(data, dtype=np.uint8).astype(np.uint64)
+        count = len(raw) - k + 1
+        packed = raw[:count].copy()
+        for i in range(1, k):
+            packed |= raw[i:i + count] << np.uint64(8 * i)
+        return np.unique(packed)
+
+    def signature(self, text, chunk_size=4096):
+        shingles = self.shingles(text)
+        signature = np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint32)
+        for start in range(0, len(shingles), chunk_size):
+            chunk = shingles[start:start + chunk_size]
+            hashed = (self._a[:, None] * chunk[None, :] + self._b[:, None]) >> np.uint64(32)
+            np.minimum(signature, (hashed & _MASK32).min(axis=1).astype(np.uint32), out=signature)
+        return signature
+
+    def query(self, signature):
+        """Return (cluster_id, similarity, ai_probability, is_ai_generated) of the closest indexed text, or None"""
+        with self._lock:
+            candidates = set()
+            for band, key in enumerate(self._band_keys(signature)):
+                candidates.update(self._buckets[band].get(key, ()))
+            if not candidates:
+                return None
+
+            ids = list(candidates)
+            signatures = np.stack([self._entries[entry_id][0] for entry_id in ids])
+            similarities = (signatures == signature).mean(axis=1)
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                return None
+
+            entry_id = ids[best]
+            self._entries.move_to_end(entry_id)
+            _, cluster_id, ai_probability, is_ai_generated = self._entries[entry_id]
+            return cluster_id, similarity, ai_probability, is_ai_generated
+
+    def add(self, signature, ai_probability, is_ai_generated, cluster_id=None):
+        """Index the verdict of a scored text; returns its cluster ID"""
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            cluster_id = cluster_id or f'cluster-{entry_id}'
+            self._entries[entry_id] = (signature, cluster_id, float(ai_probability), bool(is_ai_generated))
+            for band, key in enumerate(self._band_keys(signature)):
+                self._buckets[band].setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._evict_oldest()
+            return cluster_id
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'evictions': self._evictions,
+            'num_perm': self.num_perm,
+            'bands': self.bands,
+            'threshold': self.threshold
+        }
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def _evict_oldest(self):
+        entry_id, (signature, *_) = self._entries.popitem(last=False)
+        for band, key in enumerate(self._band_keys(signature)):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[band][key]
+        self._evictions += 1
@@ -1,15 +1,26 @@
+import os
 import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 from datetime import datetime
 import numpy as np
 
+from utils.tracing import tracer
+from .stylometry import extract_features, feature_metadata
+from .text_backends import load_backend
+
+MODEL_NAME = "Hello-SimpleAI/chatgpt-detector-roberta"
+
 class EnhancedTextDetector:
-    def __init__(self):
-        print("🤖 Loading AI text detection model...")
+    def __init__(self, backend=None, num_threads=None):
+        backend = backend or os.environ.get('TRUTHGUARD_TEXT_BACKEND', 'torch')
+        num_threads = num_threads or int(os.environ.get('TRUTHGUARD_TORCH_THREADS', 0)) or None
+        print(f"🤖 Loading AI text detection model ({backend} backend)...")
         try:
-            self.tokenizer = AutoTokenizer.from_pretrained("Hello-SimpleAI/chatgpt-detector-roberta")
-            self.model = AutoModelForSequenceClassification.from_pretrained("Hello-SimpleAI/chatgpt-detector-roberta")
-            self.model.eval()
+            self.tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+            model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
+            model.eval()
+            self.backend = load_backend(backend, model, MODEL_NAME, num_threads=num_threads)
+            self.model_version = f"{MODEL_NAME}:{self.backend.name}"
             print("✅ Text detection model loaded successfully!")
         except Exception as e:
             print(f"❌ Error loading model: {e}")
@@ -17,34 +28,130 @@ class EnhancedTextDetector:
         
     def detect_text(self, text):
         """Detect if text is AI-generated with detailed analysis"""
+        return self.detect_batch([text])[0]
+
+    def detect_batch(self, texts):
+        """Score several texts with one tokenizer call and one forward pass"""
         try:
-            inputs = self.tokenizer(text, truncation=True, padding=True, return_tensors="pt", max_length=512)
-            
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-                
-            ai_probability = float(predictions[0][1])
-            confidence_score = max(ai_probability, 1 - ai_probability)
-            
-            words = text.split()
-            return {
-                'is_ai_generated': ai_probability > 0.5,
-                'ai_probability': ai_probability,
-                'human_probability': 1 - ai_probability,
-                'confidence_score': confidence_score,
-                'explanation': self._generate_explanation(ai_probability, text),
-                'metadata': {
-                    'word_count': len(words),
-                    'character_count': len(text),
-                    'sentence_count': len([s for s in text.split('.') if s.strip()]),
-                    'avg_word_length': np.mean([len(word) for word in words]) if words else 0
-                },
-                'timestamp': datetime.now().isoformat(),
-                'analysis_type': 'enhanced_text_detection'
-            }
+            inputs = self.tokenize(texts)
+        except Exception as e:
+            return [{'error': f'Detection failed: {str(e)}'} for _ in texts]
+        return self.score(texts, inputs)
+
+    def tokenize(self, texts):
+        """First half of ``detect_batch``: the fast tokenizer's batch call"""
+        with tracer.span('text.tokenize'):
+            return self.tokenizer(texts, truncation=True, padding=True, return_tensors="pt", max_length=512)
+
+    def score(self, texts, inputs):
+        """Second half of ``detect_batch``: forward pass and results for tokenized ``texts``"""
+        try:
+            with tracer.span('text.forward'):
+                logits = self.backend.logits(inputs['input_ids'], inputs['attention_mask'])
+            with tracer.span('text.softmax'):
+                predictions = torch.nn.functional.softmax(logits, dim=-1)
+                ai_probabilities = predictions[:, 1].tolist()
+        except Exception as e:
+            return [{'error': f'Detection failed: {str(e)}'} for _ in texts]
+
+        with tracer.span('text.build_response'):
+            features = extract_features(texts)
+            return [self._build_result(text, ai_probability, features[i])
+                    for i, (text, ai_probability) in enumerate(zip(texts, ai_probabilities))]
+
+    def detect_long_text(self, text, window_tokens=510, stride=384, windows_per_pass=32):
+        """Score a document of any length with overlapping token windows.
+
+        The text is tokenized once; windows are sliced from the same token IDs
+        and scored together in batched forward passes of up to
+        ``windows_per_pass`` windows.
+        """
+        try:
+            with tracer.span('text.tokenize'):
+                encoding = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True,
+                                          truncation=False, verbose=False)
+            token_ids = encoding['input_ids']
+            offsets = encoding['offset_mapping']
+            if len(token_ids) <= window_tokens:
+                result = self.detect_text(text)
+                if 'error' not in result:
+                    result['windows'] = [{'token_start': 0, 'token_end': len(token_ids),
+                                          'start_char': 0, 'end_char': len(text),
+                                          'ai_probability': result['ai_probability']}]
+                return result
+
+            spans = self._window_spans(len(token_ids), window_tokens, stride)
+            ids = torch.tensor(token_ids, dtype=torch.long)
+            window_probabilities = []
+            for first in range(0, len(spans), windows_per_pass):
+                chunk = spans[first:first + windows_per_pass]
+                input_ids, attention_mask = self._window_tensors(ids, chunk, window_tokens)
+                with tracer.span('text.forward'):
+                    logits = self.backend.logits(input_ids, attention_mask)
+                predictions = torch.nn.functional.softmax(logits, dim=-1)
+                window_probabilities.extend(predictions[:, 1].tolist())
         except Exception as e:
             return {'error': f'Detection failed: {str(e)}'}
+
+        lengths = np.array([end - start for start, end in spans], dtype=np.float64)
+        probabilities = np.array(window_probabilities)
+        ai_probability = float(np.dot(lengths, probabilities) / lengths.sum())
+
+        result = self._build_result(text, ai_probability, extract_features([text])[0])
+        result['analysis_type'] = 'long_document_text_detection'
+        result['metadata'].update({
+            'token_count': len(token_ids),
+            'window_count': len(spans),
+            'window_tokens': window_tokens,
+            'stride': stride,
+            'max_window_probability': float(probabilities.max()),
+            'aggregation': 'length_weighted_mean'
+        })
+        result['windows'] = [
+            {
+                'token_start': start,
+                'token_end': end,
+                'start_char': offsets[start][0],
+                'end_char': offsets[end - 1][1],
+                'ai_probability': probability
+            }
+            for (start, end), probability in zip(spans, window_probabilities)
+        ]
+        return result
+
+    @staticmethod
+    def _window_spans(token_count, window_tokens, stride):
+        starts = list(range(0, token_count - window_tokens + 1, stride))
+        if starts[-1] + window_tokens < token_count:
+            starts.append(token_count - window_tokens)
+        return [(start, min(start + window_tokens, token_count)) for start in starts]
+
+    def _window_tensors(self, ids, spans, window_tokens):
+        """Build padded [CLS] window [SEP] rows from slices of one token ID tensor"""
+        pad_id = self.tokenizer.pad_token_id
+        input_ids = torch.full((len(spans), window_tokens + 2), pad_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(spans), window_tokens + 2), dtype=torch.long)
+        for row, (start, end) in enumerate(spans):
+            length = end - start
+            input_ids[row, 0] = self.tokenizer.cls_token_id
+            input_ids[row, 1:length + 1] = ids[start:end]
+            input_ids[row, length + 1] = self.tokenizer.sep_token_id
+            attention_mask[row, :length + 2] = 1
+        return input_ids, attention_mask
+
+    def _build_result(self, text, ai_probability, features):
+        confidence_score = max(ai_probability, 1 - ai_probability)
+        
+        return {
+            'is_ai_generated': ai_probability > 0.5,
+            'ai_probability': ai_probability,
+            'human_probability': 1 - ai_probability,
+            'confidence_score': confidence_score,
+            'explanation': self._generate_explanation(ai_probability, text),
+            'metadata': feature_metadata(features),
+            'timestamp': datetime.now().isoformat(),
+            'analysis_type': 'enhanced_text_detection'
+        }
     
     def _generate_explanation(self, ai_prob, text):
         if ai_prob > 0.8:
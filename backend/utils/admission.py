@@ -0,0 +1,179 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+
+LANES = ('interactive', 'bulk')
+
+
+class AdmissionRejected(RuntimeError):
+    """Request turned away before doing any work; carries its HTTP status"""
+
+    def __init__(self, message, status, retry_after):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ('enqueued', 'event', 'granted', 'abandoned')
+
+    def __init__(self):
+        self.enqueued = time.monotonic()
+        self.event = threading.Event()
+        self.granted = False
+        self.abandoned = False
+
+
+class Ticket:
+    """An admitted request's slot; release it exactly once when the work is done"""
+
+    def __init__(self, controller, lane):
+        self._controller = controller
+        self.lane = lane
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._controller._release(self.lane, time.monotonic() - self._started)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+        return False
+
+
+class AdmissionController:
+    """Bounded admission with strict-priority lanes and client deadlines.
+
+    At most ``capacity`` requests run at once; bulk requests may hold at
+    most ``capacity - reserved_interactive`` of those slots, so interactive
+    requests always find headroom. Requests that cannot start wait in their
+    lane's queue, bounded by ``max_queue[lane]``; a full queue rejects at
+    once with 429. A freed slot goes to the interactive lane first and,
+    within a lane, to the waiter with the earliest deadline. Waiters whose
+    deadline passes are dropped with 503 instead of running late.
+
+    Rejections carry a Retry-After estimated from the queue length and the
+    recent service time. ``on_admit(lane, wait_seconds)`` and
+    ``on_reject(lane, reason)`` are optional metrics callbacks.
+    """
+
+    def __init__(self, capacity=32, max_queue=None, reserved_interactive=4, default_timeout=30.0,
+                 on_admit=None, on_reject=None):
+        self.capacity = capacity
+        self.max_queue = dict({'interactive': 64, 'bulk': 256}, **(max_queue or {}))
+        self.lane_capacity = {'interactive': capacity, 'bulk': max(1, capacity - reserved_interactive)}
+        self.default_timeout = default_timeout
+        self.on_admit = on_admit
+        self.on_reject = on_reject
+        self._running = {lane: 0 for lane in LANES}
+        self._queues = {lane: [] for lane in LANES}  # heaps of (deadline, seq, waiter)
+        self._queued = {lane: 0 for lane in LANES}
+        self._service_time = 0.1  # EWMA of seconds per admitted request
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def admit(self, lane, deadline=None):
+        """Block until ``lane`` gets a slot; returns a Ticket (a context manager).
+
+        ``deadline`` is a ``time.time()`` timestamp; without one the request
+        waits up to ``default_timeout`` seconds.
+        """
+        if lane not in self._queues:
+            raise ValueError(f"Unknown lane '{lane}', expected one of {', '.join(LANES)}")
+        now = time.time()
+        if deadline is None:
+            deadline = now + self.default_timeout
+        if deadline <= now:
+            self._reject(lane, 'expired')
+            raise AdmissionRejected('Request deadline has already passed', 503, 1)
+
+        with self._lock:
+            if self._queued[lane] == 0 and not self._blocked_by_priority(lane) and self._has_slot(lane):
+                self._running[lane] += 1
+                waiter = None
+            elif self._queued[lane] >= self.max_queue[lane]:
+                retry_after = self._retry_after(lane)
+                waiter = False
+            else:
+                waiter = _Waiter()
+                heapq.heappush(self._queues[lane], (deadline, next(self._seq), waiter))
+                self._queued[lane] += 1
+        if waiter is False:
+            self._reject(lane, 'queue_full')
+            raise AdmissionRejected(f'The {lane} queue is full', 429, retry_after)
+        if waiter is None:
+            return self._ticket(lane, 0.0)
+
+        waiter.event.wait(max(0.0, deadline - time.time()))
+        with self._lock:
+            if not waiter.granted:
+                waiter.abandoned = True
+                self._queued[lane] -= 1
+                retry_after = self._retry_after(lane)
+                # Lower-priority waiters may have been held back for this one
+                self._dispatch()
+        if not waiter.granted:
+            self._reject(lane, 'expired')
+            raise AdmissionRejected('Request deadline passed while queued', 503, retry_after)
+        return self._ticket(lane, time.monotonic() - waiter.enqueued)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'capacity': self.capacity,
+                'running': dict(self._running),
+                'queued': dict(self._queued),
+                'max_queue': dict(self.max_queue),
+                'service_time_seconds': self._service_time
+            }
+
+    def _ticket(self, lane, waited):
+        if self.on_admit is not None:
+            self.on_admit(lane, waited)
+        return Ticket(self, lane)
+
+    def _release(self, lane, duration):
+        with self._lock:
+            self._running[lane] -= 1
+            self._service_time += 0.1 * (duration - self._service_time)
+            self._dispatch()
+
+    def _has_slot(self, lane):
+        return sum(self._running.values()) < self.capacity and self._running[lane] < self.lane_capacity[lane]
+
+    def _blocked_by_priority(self, lane):
+        # Strict priority: bulk never jumps ahead of waiting interactive requests
+        return lane == 'bulk' and self._queued['interactive'] > 0
+
+    def _dispatch(self):
+        """Hand freed slots to waiters, interactive lane first (lock held)"""
+        now = time.time()
+        for lane in LANES:
+            queue = self._queues[lane]
+            while queue and self._has_slot(lane):
+                deadline, _, waiter = heapq.heappop(queue)
+                if waiter.abandoned or deadline <= now:
+                    # Expired waiters time out on their own and report the rejection
+                    continue
+                waiter.granted = True
+                self._queued[lane] -= 1
+                self._running[lane] += 1
+                waiter.event.set()
+            if self._queued[lane] > 0:
+                return
+
+    def _retry_after(self, lane):
+        """Seconds until the lane's current backlog has likely drained (lock held)"""
+        backlog = self._queued[lane] + (self._queued['interactive'] if lane == 'bulk' else 0)
+        return max(1, math.ceil(backlog * self._service_time / self.lane_capacity[lane]))
+
+    def _reject(self, lane, reason):
+        if self.on_reject is not None:
+            self.on_reject(lane, reason)
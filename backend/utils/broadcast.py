@@ -0,0 +1,168 @@
+import json
+import threading
+import time
+from collections import deque
+
+
+class DetectionBroadcaster:
+    """Coalesces detection events into one Socket.IO message per interval.
+
+    ``publish`` and ``publish_alert`` only append to bounded buffers, so
+    request threads never talk to clients. Every ``interval`` seconds the
+    buffers are drained into a single batch of ``{type, result}`` events,
+    sensor alerts and the dashboard stats that changed, serialized once and
+    sent to each connected client.
+
+    Clients acknowledge each batch. While a client still owes an ack, new
+    batches are merged into a single pending batch for it (keeping the
+    newest ``max_events`` events and counting the rest as dropped), so a
+    slow dashboard costs bounded memory instead of an ever-growing backlog.
+    """
+
+    def __init__(self, socketio, stats=None, interval=0.25, max_events=200, ack_timeout=5.0,
+                 event='detection_update'):
+        self.socketio = socketio
+        self.stats = stats
+        self.interval = interval
+        self.max_events = max_events
+        self.ack_timeout = ack_timeout
+        self.event = event
+        self._events = deque()
+        self._alerts = deque(maxlen=max_events)
+        self._dropped = 0
+        self._clients = {}  # sid -> {'sent_at': time awaiting ack or None, 'pending': batch or None}
+        self._last_stats = {}
+        self._lock = threading.Lock()
+        self._task = None
+        self.batches_sent = 0
+        self.events_dropped = 0
+
+    def publish(self, kind, result):
+        event = {
+            'type': kind,
+            'result': {
+                'is_ai_generated': result.get('is_ai_generated'),
+                'ai_probability': result.get('ai_probability'),
+                'confidence_score': result.get('confidence_score'),
+                'timestamp': result.get('timestamp')
+            }
+        }
+        with self._lock:
+            if not self._clients:
+                return
+            if len(self._events) >= self.max_events:
+                self._events.popleft()
+                self._dropped += 1
+            self._events.append(event)
+
+    def publish_alert(self, alert):
+        with self._lock:
+            if self._clients:
+                self._alerts.append(alert)
+
+    def add_client(self, sid):
+        with self._lock:
+            self._clients[sid] = {'sent_at': None, 'pending': None}
+            if self._task is None:
+                self._task = self.socketio.start_background_task(self._flush_loop)
+        # A new dashboard gets the full stats, not just the next delta
+        if self.stats is not None:
+            batch = {'events': [], 'alerts': [], 'stats': self.stats(), 'dropped': 0}
+            with self._lock:
+                send = self._claim(sid, batch)
+            self._emit([send])
+
+    def remove_client(self, sid):
+        with self._lock:
+            self._clients.pop(sid, None)
+
+    @property
+    def client_count(self):
+        return len(self._clients)
+
+    def flush(self):
+        with self._lock:
+            events = list(self._events)
+            alerts = list(self._alerts)
+            dropped = self._dropped
+            self._events.clear()
+            self._alerts.clear()
+            self._dropped = 0
+            if not self._clients:
+                return
+        stats = self._stats_delta()
+        # With nothing new, clients whose ack timed out still get their pending batch
+        batch = None
+        if events or alerts or stats:
+            batch = {'events': events, 'alerts': alerts, 'stats': stats, 'dropped': dropped}
+            payload = json.dumps(batch)
+        now = time.monotonic()
+        # Client state only changes under the lock (acks arrive on other
+        # threads); the sends themselves happen after it is released
+        sends = []
+        with self._lock:
+            self.events_dropped += dropped
+            for sid, state in self._clients.items():
+                if state['sent_at'] is not None and now - state['sent_at'] < self.ack_timeout:
+                    if batch is not None:
+                        state['pending'] = self._merge(state['pending'], batch)
+                elif state['pending'] is not None:
+                    sends.append(self._claim(sid, self._merge(state['pending'], batch) if batch else state['pending']))
+                elif batch is not None:
+                    sends.append(self._claim(sid, payload))
+        self._emit(sends)
+
+    def _flush_loop(self):
+        while True:
+            self.socketio.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error broadcasting detection updates: {e}")
+
+    def _stats_delta(self):
+        if self.stats is None:
+            return {}
+        current = self.stats()
+        delta = {key: value for key, value in current.items() if self._last_stats.get(key) != value}
+        self._last_stats = current
+        return delta
+
+    def _merge(self, pending, batch):
+        if pending is None:
+            return batch
+        events = pending['events'] + batch['events']
+        overflow = max(0, len(events) - self.max_events)
+        self.events_dropped += overflow
+        return {
+            'events': events[overflow:],
+            'alerts': (pending['alerts'] + batch['alerts'])[-self.max_events:],
+            'stats': dict(pending['stats'], **batch['stats']),
+            'dropped': pending['dropped'] + batch['dropped'] + overflow
+        }
+
+    def _claim(self, sid, batch):
+        """Mark ``batch`` (a dict, or an already serialized str) as in flight to ``sid`` (lock held)"""
+        state = self._clients.get(sid)
+        if state is None:
+            return None
+        state['sent_at'] = time.monotonic()
+        state['pending'] = None
+        self.batches_sent += 1
+        return sid, batch
+
+    def _emit(self, sends):
+        for sid, batch in filter(None, sends):
+            payload = batch if isinstance(batch, str) else json.dumps(batch)
+            self.socketio.emit(self.event, payload, to=sid, callback=lambda *args, sid=sid: self._acked(sid))
+
+    def _acked(self, sid):
+        with self._lock:
+            state = self._clients.get(sid)
+            if state is None:
+                return
+            state['sent_at'] = None
+            if state['pending'] is None:
+                return
+            send = self._claim(sid, state['pending'])
+        self._emit([send])
@@ -0,0 +1,204 @@
+import json
+from collections import deque
+
+CHUNK_SIZE = 64 * 1024
+_WHITESPACE = ' \t\r\n'
+
+
+class BulkParseError(ValueError):
+    """The body itself is malformed; nothing after this point can be read"""
+
+
+class BulkItemError(BulkParseError):
+    """One item is unusable; the items around it are still scored"""
+
+
+def iter_bulk_items(stream, content_type='', max_item_bytes=1024 * 1024):
+    """Yield (client_id, text) pairs from a JSON array or NDJSON request body.
+
+    The body is read incrementally, so memory is bounded by ``max_item_bytes``
+    rather than by the size of the upload. An item that is not a string or
+    an object with a string ``text`` (or an NDJSON line that is not valid
+    JSON) yields a ``BulkItemError`` in place of its text; a malformed body
+    raises ``BulkParseError``.
+    """
+    if 'ndjson' in content_type or 'jsonlines' in content_type:
+        records = _iter_ndjson(stream, max_item_bytes)
+    else:
+        records = _iter_json_array(stream, max_item_bytes)
+
+    for index, record in enumerate(records):
+        yield _normalize_item(index, record)
+
+
+def iter_scored_batches(detect_batch, items, batch_size=32, window=512, submit=None, in_flight=2):
+    """Score items in length-sorted batches, yielding (client_id, result) pairs.
+
+    Up to ``window`` items are buffered and sorted by length so that each
+    batch pads to a similar sequence length; results are yielded as soon as
+    their batch finishes. With ``submit`` (a function returning a Future of
+    a batch's results, e.g. ``TextPipeline.submit``) up to ``in_flight``
+    batches are queued ahead so the next one is tokenized during the
+    current forward pass.
+
+    Items carrying a ``BulkItemError`` yield an ``{'error': ...}`` result
+    right away. A ``BulkParseError`` from ``items`` is re-raised only after
+    the items buffered before it have been scored and yielded.
+    """
+    buffer = []
+    items = iter(items)
+    while True:
+        try:
+            item = next(items, None)
+        except BulkParseError:
+            if buffer:
+                yield from _score_window(detect_batch, buffer, batch_size, submit, in_flight)
+            raise
+        if item is None:
+            break
+        client_id, text = item
+        if isinstance(text, BulkItemError):
+            yield client_id, {'error': str(text)}
+            continue
+        buffer.append(item)
+        if len(buffer) >= window:
+            yield from _score_window(detect_batch, buffer, batch_size, submit, in_flight)
+            buffer = []
+    if buffer:
+        yield from _score_window(detect_batch, buffer, batch_size, submit, in_flight)
+
+
+def _score_window(detect_batch, items, batch_size, submit=None, in_flight=2):
+    items.sort(key=lambda item: len(item[1]))
+    batches = [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+    if submit is None:
+        for batch in batches:
+            yield from zip((client_id for client_id, _ in batch), detect_batch([text for _, text in batch]))
+        return
+
+    queued = deque()
+    for batch in batches:
+        queued.append((batch, submit([text for _, text in batch])))
+        if len(queued) > in_flight:
+            yield from _finished(*queued.popleft())
+    while queued:
+        yield from _finished(*queued.popleft())
+
+
+def _finished(batch, future):
+    return zip((client_id for client_id, _ in batch), future.result())
+
+
+def _normalize_item(index, record):
+    if isinstance(record, BulkItemError):
+        return index, record
+    if isinstance(record, str):
+        return index, record
+    client_id = record.get('id', index) if isinstance(record, dict) else index
+    if isinstance(record, dict) and isinstance(record.get('text'), str):
+        return client_id, record['text']
+    return client_id, BulkItemError(f"Item {index} must be a string or an object with a 'text' field")
+
+
+def _iter_ndjson(stream, max_item_bytes):
+    while True:
+        line = stream.readline(max_item_bytes + 1)
+        if not line:
+            return
+        if len(line) > max_item_bytes and not line.endswith(b'\n'):
+            raise BulkParseError(f"NDJSON line exceeds {max_item_bytes} bytes")
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                # Lines frame the records, so the next line is still readable
+                yield BulkItemError(f"Invalid JSON: {e}")
+
+
+def _iter_json_array(stream, max_item_bytes):
+    """Incrementally decode the elements of a top-level JSON array"""
+    decoder = json.JSONDecoder()
+    reader = _Utf8Reader(stream)
+    buffer = ''
+    pos = 0
+
+    def fill():
+        nonlocal buffer, pos
+        chunk = reader.read()
+        if not chunk:
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer) or not fill():
+                return
+
+    skip_whitespace()
+    if pos >= len(buffer) or buffer[pos] != '[':
+        raise BulkParseError("Expected a JSON array of texts")
+    pos += 1
+
+    expect_value = True
+    while True:
+        skip_whitespace()
+        if pos >= len(buffer):
+            raise BulkParseError("Unterminated JSON array")
+        char = buffer[pos]
+        if char == ']':
+            return
+        if not expect_value:
+            if char != ',':
+                raise BulkParseError(f"Expected ',' in JSON array, found {char!r}")
+            pos += 1
+            expect_value = True
+            continue
+
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                if end < len(buffer) or not isinstance(value, (int, float)):
+                    break
+            except json.JSONDecodeError:
+                pass
+            if len(buffer) - pos > max_item_bytes:
+                raise BulkParseError(f"Array element exceeds {max_item_bytes} bytes")
+            if not fill():
+                value, end = decoder.raw_decode(buffer, pos)
+                break
+        pos = end
+        expect_value = False
+        yield value
+
+
+class _Utf8Reader:
+    """Reads fixed-size chunks and decodes UTF-8 without splitting characters"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.pending = b''
+
+    def read(self):
+        while True:
+            chunk = self.stream.read(CHUNK_SIZE)
+            if not chunk:
+                if self.pending:
+                    raise BulkParseError("Truncated UTF-8 sequence in request body")
+                return ''
+            data = self.pending + chunk
+            try:
+                text = data.decode('utf-8')
+                self.pending = b''
+                return text
+            except UnicodeDecodeError as e:
+                if e.start < len(data) - 3:
+                    raise BulkParseError("Request body is not valid UTF-8")
+                self.pending = data[e.start:]
+                if e.start:
+                    return data[:e.start].decode('utf-8')
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+import weakref
+from collections import OrderedDict
+
+
+def text_cache_key(text, model_version):
+    """Hash of the normalized text plus the model version"""
+    normalized = ' '.join(unicodedata.normalize('NFC', text).split())
+    return _digest(model_version, normalized.encode('utf-8'))
+
+
+def image_cache_key(image_data, model_version):
+    """Hash of the image payload (base64 data URLs are keyed on the payload only).
+
+    Seekable file objects are hashed in chunks and rewound for the detector.
+    """
+    if hasattr(image_data, 'read'):
+        h = _hasher(model_version)
+        for chunk in iter(lambda: image_data.read(1024 * 1024), b''):
+            h.update(chunk)
+        image_data.seek(0)
+        return h.hexdigest()
+    if isinstance(image_data, str):
+        if image_data.startswith('data:'):
+            image_data = image_data.partition(',')[2]
+        image_data = ''.join(image_data.split()).encode('utf-8')
+    return _digest(model_version, image_data)
+
+
+def _hasher(model_version):
+    h = hashlib.blake2b(digest_size=20)
+    h.update(model_version.encode('utf-8'))
+    h.update(b'\0')
+    return h
+
+
+def _digest(model_version, payload):
+    h = _hasher(model_version)
+    h.update(payload)
+    return h.hexdigest()
+
+
+class DetectionCache:
+    """Two-tier cache for detection results.
+
+    The memory tier is an LRU bounded by entry count and total serialized
+    size, with a per-entry TTL. The optional SQLite tier survives restarts;
+    memory misses fall through to it and disk hits are promoted back into
+    memory. Results are stored as JSON so callers always get a fresh copy.
+    """
+
+    PURGE_EVERY = 1000
+
+    def __init__(self, max_entries=10000, max_bytes=64 * 1024 * 1024, ttl=3600, disk_path=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+        }
+        self.disk_path = disk_path
+        self._disk = None
+        self._disk_writes = 0
+        if disk_path:
+            self._open_disk()
+            # SQLite connections must not be shared with forked workers
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._reopen_after_fork())
+
+    def _open_disk(self):
+        self._disk = sqlite3.connect(self.disk_path, check_same_thread=False)
+        self._disk.execute('PRAGMA journal_mode=WAL')
+        self._disk.execute(
+            'CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)')
+        self._disk.commit()
+
+    def _reopen_after_fork(self):
+        self._lock = threading.Lock()
+        self._open_disk()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._counters['memory_hits'] += 1
+                    return json.loads(payload)
+                self._remove(key)
+                self._counters['expirations'] += 1
+
+            if self._disk is not None:
+                row = self._disk.execute(
+                    'SELECT value, expires_at FROM results WHERE key = ?', (key,)).fetchone()
+                if row is not None and row[1] > now:
+                    self._counters['disk_hits'] += 1
+                    self._insert(key, row[0], row[1])
+                    return json.loads(row[0])
+
+            self._counters['misses'] += 1
+            return None
+
+    def set(self, key, result):
+        payload = json.dumps(result)
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._insert(key, payload, expires_at)
+            if self._disk is not None:
+                self._disk.execute(
+                    'INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)',
+                    (key, payload, expires_at))
+                self._disk_writes += 1
+                if self._disk_writes % self.PURGE_EVERY == 0:
+                    self._disk.execute('DELETE FROM results WHERE expires_at <= ?', (time.time(),))
+                self._disk.commit()
+
+    def get_or_compute(self, key, compute):
+        """Return the cached result for key, computing and storing it on a miss"""
+        result = self.get(key)
+        if result is None:
+            result = compute()
+            if 'error' not in result:
+                self.set(key, result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            counters['entries'] = len(self._entries)
+            counters['bytes'] = self._bytes
+        lookups = counters['memory_hits'] + counters['disk_hits'] + counters['misses']
+        counters['hit_rate'] = (counters['memory_hits'] + counters['disk_hits']) / lookups if lookups else 0.0
+        counters['disk_enabled'] = self._disk is not None
+        return counters
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._disk is not None:
+                self._disk.execute('DELETE FROM results')
+                self._disk.commit()
+
+    def _insert(self, key, payload, expires_at):
+        if key in self._entries:
+            self._remove(key)
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (expires_at, payload)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._counters['evictions'] += 1
+
+    def _remove(self, key):
+        _, payload = self._entries.pop(key)
+        self._bytes -= len(payload)
@@ -0,0 +1,275 @@
+import math
+import multiprocessing
+import signal
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures import wait
+from concurrent.futures.process import BrokenProcessPool
+
+# Seconds a job may overrun its deadline inside the worker (e.g. stuck in
+# native code that SIGALRM cannot interrupt) before its pool is recycled
+KILL_GRACE = 5.0
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+class JobWorkersUnavailable(RuntimeError):
+    """The worker pool is broken and could not be recreated"""
+
+
+class JobTimeout(Exception):
+    pass
+
+
+# Detectors inherited by each pool worker at fork time
+_worker_detectors = {}
+
+
+def _init_worker(detectors, warmups):
+    global _worker_detectors
+    _worker_detectors = detectors
+    signal.signal(signal.SIGALRM, _alarm)
+    for name, warmup in warmups.items():
+        warmup(detectors[name])
+
+
+def _alarm(signum, frame):
+    raise JobTimeout('Job exceeded its timeout')
+
+
+def _run_job(kind, payload, options, deadline):
+    # Jobs run on the worker's main thread, so an interval timer can interrupt them
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise JobTimeout('Job exceeded its timeout')
+    signal.setitimer(signal.ITIMER_REAL, remaining)
+    try:
+        return _detect(kind, payload, options)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _detect(kind, payload, options):
+    if kind == 'text':
+        detector = _worker_detectors['text']
+        if options.get('long_document'):
+            return detector.detect_long_text(payload)
+        return detector.detect_text(payload)
+    if kind == 'image':
+        return _worker_detectors['image'].detect_manipulation(payload)
+    return {'error': f'Unknown job type: {kind}'}
+
+
+class JobManager:
+    """Asynchronous detection jobs on a process pool of pre-loaded detectors.
+
+    Workers are forked from a process that has already loaded the
+    detectors, so each starts with the weights in place (shared
+    copy-on-write) and only runs the warm-up. Call ``start`` after loading
+    but before this process runs any inference, so the fork does not
+    inherit busy thread pools.
+
+    At most ``max_pending`` jobs may be queued or running. A job past its
+    timeout is interrupted inside the worker (SIGALRM) and reported as
+    ``timed_out``; one that still has not returned ``KILL_GRACE`` seconds
+    later counts against ``max_pending`` until its pool is killed and
+    forked again; the pool's other unfinished jobs move to the new pool. A
+    pool broken by a crashed worker is replaced on the next submit.
+    Queued jobs can be cancelled. Finished jobs expire ``result_ttl``
+    seconds after completion.
+    """
+
+    def __init__(self, max_workers=2, max_pending=100, default_timeout=120, result_ttl=600, on_result=None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.default_timeout = default_timeout
+        self.result_ttl = result_ttl
+        self.on_result = on_result
+        self._executor = None
+        self._detectors = None
+        self._warmups = None
+        self._jobs = {}
+        # Reentrant: cancelling a future under the lock runs _finish, which marks the job
+        self._lock = threading.RLock()
+        self._sweeper = None
+
+    @property
+    def started(self):
+        return self._executor is not None
+
+    @property
+    def pending(self):
+        """Jobs queued or running"""
+        with self._lock:
+            return self._count_pending()
+
+    def start(self, detectors, warmups=None):
+        if self._executor is not None:
+            return
+        self._detectors = detectors
+        self._warmups = warmups or {}
+        self._executor = self._new_executor()
+        # Fork every worker now, while this process is still quiet
+        wait([self._executor.submit(time.sleep, 0) for _ in range(self.max_workers)])
+        self._sweeper = threading.Thread(target=self._sweep_loop, name='job-sweeper', daemon=True)
+        self._sweeper.start()
+
+    def submit(self, kind, payload, options=None, timeout=None):
+        if self._executor is None:
+            raise RuntimeError("Job workers are not running")
+        if timeout is not None and not 0 < timeout < math.inf:
+            raise ValueError("timeout must be a positive, finite number of seconds")
+        with self._lock:
+            if self._count_pending() >= self.max_pending:
+                raise JobQueueFull(f"Job queue is full ({self.max_pending} jobs pending)")
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            job = {
+                'job_id': job_id,
+                'type': kind,
+                'state': 'queued',
+                'submitted_at': now,
+                'deadline': now + (timeout or self.default_timeout),
+                'finished_at': None,
+                'result': None,
+                'error': None,
+                'call': (kind, payload, options or {})
+            }
+            try:
+                self._dispatch(job)
+            except BrokenProcessPool:
+                try:
+                    self._recycle()
+                    self._dispatch(job)
+                except (BrokenProcessPool, OSError) as e:
+                    raise JobWorkersUnavailable(f"Job workers are unavailable: {e}") from e
+            self._jobs[job_id] = job
+        return job_id
+
+    def get(self, job_id, wait_seconds=0):
+        """Job status; with wait_seconds, long-poll until it finishes"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if wait_seconds and job['state'] in ('queued', 'running'):
+            timeout = max(0, min(wait_seconds, job['deadline'] - time.time()))
+            try:
+                job['future'].result(timeout=timeout)
+            except (FutureTimeout, CancelledError, Exception):
+                pass
+        self._check_deadline(job)
+        return self._public(job)
+
+    def cancel(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        with self._lock:
+            self._check_deadline(job)
+            if job['state'] in ('queued', 'running') and job['future'].cancel():
+                self._mark(job, 'cancelled')
+            return self._public(job)
+
+    def _count_pending(self):
+        # Timed-out jobs still occupying a worker count until they really stop
+        return sum(1 for job in self._jobs.values()
+                   if job['state'] in ('queued', 'running') or not job['future'].done())
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context('fork'),
+                                   initializer=_init_worker, initargs=(self._detectors, self._warmups))
+
+    def _dispatch(self, job):
+        """Submit a job's call to the current pool (lock held)"""
+        future = self._executor.submit(_run_job, *job['call'], job['deadline'])
+        job['future'] = future
+        future.add_done_callback(lambda future: self._finish(job, future))
+
+    def _recycle(self):
+        """Kill the current pool's workers and fork a new pool (lock held).
+
+        Unfinished jobs that have not timed out are resubmitted to the new pool.
+        """
+        old = self._executor
+        self._executor = self._new_executor()
+        for job in self._jobs.values():
+            future = job['future']
+            if job['state'] in ('queued', 'running') and not future.done() and job.get('call'):
+                # Replace before cancelling, so the old future's callback sees itself superseded
+                self._dispatch(job)
+                future.cancel()
+        for process in list((old._processes or {}).values()):
+            process.kill()
+        old.shutdown(wait=False, cancel_futures=True)
+
+    def _finish(self, job, future):
+        if future is not job['future']:
+            return  # superseded by a resubmission to a recycled pool
+        job.pop('call', None)
+        if job['state'] in ('cancelled', 'timed_out'):
+            return
+        if future.cancelled():
+            self._mark(job, 'cancelled')
+            return
+        error = future.exception()
+        if isinstance(error, JobTimeout):
+            self._mark(job, 'timed_out', error=str(error))
+            return
+        if isinstance(error, BrokenProcessPool):
+            self._mark(job, 'failed', error='Job worker process exited')
+            return
+        if error is not None:
+            self._mark(job, 'failed', error=str(error))
+            return
+        result = future.result()
+        if not self._mark(job, 'failed' if 'error' in result else 'done', result=result, error=result.get('error')):
+            return  # timed out or cancelled meanwhile
+        if self.on_result is not None:
+            self.on_result(job['type'], result)
+
+    def _check_deadline(self, job):
+        with self._lock:
+            if job['state'] == 'queued' and job['future'].running():
+                job['state'] = 'running'
+            if job['state'] in ('queued', 'running') and time.time() > job['deadline']:
+                self._mark(job, 'timed_out', error='Job exceeded its timeout')
+                job['future'].cancel()
+
+    def _mark(self, job, state, result=None, error=None):
+        """Move an unfinished job to a final state; False if it already has one"""
+        with self._lock:
+            if job['state'] not in ('queued', 'running'):
+                return False
+            job['state'] = state
+            job['result'] = result
+            job['error'] = error
+            job['finished_at'] = time.time()
+            return True
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(1)
+            now = time.time()
+            with self._lock:
+                jobs = list(self._jobs.values())
+            stuck = False
+            for job in jobs:
+                self._check_deadline(job)
+                if not job['future'].done() and now > job['deadline'] + KILL_GRACE:
+                    stuck = True
+                elif job['finished_at'] and now - job['finished_at'] > self.result_ttl:
+                    with self._lock:
+                        self._jobs.pop(job['job_id'], None)
+            if stuck:
+                print("⚠️ Job overran its timeout in native code; recycling job workers")
+                with self._lock:
+                    self._recycle()
+
+    @staticmethod
+    def _public(job):
+        return {key: value for key, value in job.items() if key not in ('future', 'deadline', 'call')}
@@ -0,0 +1,398 @@
+import glob
+import json
+import math
+import os
+import threading
+import time
+import weakref
+
+# Log-linear buckets: 16 sub-buckets per power of two (about 6% relative
+# error), covering 1 microsecond up to roughly 18 minutes
+SUB_BUCKETS = 16
+MIN_EXPONENT = -20
+MAX_EXPONENT = 10
+BUCKET_COUNT = (MAX_EXPONENT - MIN_EXPONENT) * SUB_BUCKETS + 1
+
+
+def bucket_index(seconds):
+    if seconds <= 0:
+        return 0
+    mantissa, exponent = math.frexp(seconds)  # seconds = mantissa * 2**exponent, 0.5 <= mantissa < 1
+    if exponent <= MIN_EXPONENT:
+        return 0
+    if exponent > MAX_EXPONENT:
+        return BUCKET_COUNT - 1
+    sub = int((mantissa - 0.5) * 2 * SUB_BUCKETS)
+    return (exponent - MIN_EXPONENT - 1) * SUB_BUCKETS + sub + 1
+
+
+def bucket_upper_bound(index):
+    """Upper bound in seconds of a bucket"""
+    if index == 0:
+        return 2.0 ** MIN_EXPONENT
+    exponent, sub = divmod(index - 1, SUB_BUCKETS)
+    return (0.5 + (sub + 1) / (2 * SUB_BUCKETS)) * 2.0 ** (exponent + MIN_EXPONENT + 1)
+
+
+class _ShardHandle:
+    """Thread-local owner of a shard; collected when its thread exits"""
+    __slots__ = ('shard', '__weakref__')
+
+    def __init__(self, shard):
+        self.shard = shard
+
+
+class _Sharded:
+    """Per-thread shards: each thread only ever writes its own shard.
+
+    When a thread exits its shard is folded into a base total, so the
+    number of live shards follows the number of live threads rather than
+    the number of threads ever seen (the threaded server starts one per
+    request).
+    """
+
+    def __init__(self, new_shard):
+        self._new_shard = new_shard
+        self._reset()
+
+    def _shard(self):
+        handle = getattr(self._local, 'handle', None)
+        if handle is None:
+            handle = _ShardHandle(self._new_shard())
+            with self._lock:
+                self._shards.append(handle.shard)
+            self._local.handle = handle
+            ref = weakref.ref(self)
+            weakref.finalize(handle, lambda shard=handle.shard: ref() is not None and ref()._retire(shard))
+        return handle.shard
+
+    def _retire(self, shard):
+        with self._lock:
+            for index, live in enumerate(self._shards):
+                # Shards from before a fork reset are no longer listed and are dropped
+                if live is shard:
+                    del self._shards[index]
+                    self._fold(self._base, shard)
+                    break
+
+    def _all_shards(self):
+        with self._lock:
+            return [self._fold(self._new_shard(), self._base)] + self._shards
+
+    def _reset(self):
+        self._local = threading.local()
+        self._shards = []
+        self._base = self._new_shard()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _fold(target, shard):
+        raise NotImplementedError
+
+
+class ShardedCounter(_Sharded):
+    """Thread-safe counter without a lock on the increment path"""
+
+    def __init__(self):
+        super().__init__(lambda: [0])
+
+    def inc(self, amount=1):
+        self._shard()[0] += amount
+
+    @property
+    def value(self):
+        return sum(shard[0] for shard in self._all_shards())
+
+    @staticmethod
+    def _fold(target, shard):
+        target[0] += shard[0]
+        return target
+
+
+class LatencyHistogram(_Sharded):
+    """HDR-style latency histogram with per-thread sharded buckets"""
+
+    def __init__(self):
+        # [bucket counts, total seconds, max seconds]
+        super().__init__(lambda: [[0] * BUCKET_COUNT, 0.0, 0.0])
+
+    def record(self, seconds):
+        shard = self._shard()
+        shard[0][bucket_index(seconds)] += 1
+        shard[1] += seconds
+        if seconds > shard[2]:
+            shard[2] = seconds
+
+    def buckets(self):
+        """Merged state as (sparse {bucket: count}, total seconds, max seconds)"""
+        merged = {}
+        total = 0.0
+        maximum = 0.0
+        for counts, shard_total, shard_max in self._all_shards():
+            for index, count in enumerate(counts):
+                if count:
+                    merged[index] = merged.get(index, 0) + count
+            total += shard_total
+            maximum = max(maximum, shard_max)
+        return merged, total, maximum
+
+    @staticmethod
+    def _fold(target, shard):
+        counts = target[0]
+        for index, count in enumerate(shard[0]):
+            if count:
+                counts[index] += count
+        target[1] += shard[1]
+        target[2] = max(target[2], shard[2])
+        return target
+
+
+def summarize(buckets, total, maximum, unit='seconds', percentiles=(50, 95, 99)):
+    """Count, mean, max and percentiles of merged histogram buckets.
+
+    Durations (unit 'seconds') are reported in milliseconds with an _ms suffix.
+    """
+    scale, suffix = (1000, '_ms') if unit == 'seconds' else (1, '')
+    count = sum(buckets.values())
+    summary = {'count': count}
+    if not count:
+        return summary
+    summary['mean' + suffix] = total / count * scale
+    summary['max' + suffix] = maximum * scale
+    ordered = sorted(buckets.items())
+    for p in percentiles:
+        rank = math.ceil(p / 100 * count)
+        seen = 0
+        for index, bucket_count in ordered:
+            seen += bucket_count
+            if seen >= rank:
+                summary[f'p{p}{suffix}'] = min(bucket_upper_bound(index), maximum) * scale
+                break
+    return summary
+
+
+class MetricsRegistry:
+    """Named sharded counters and latency histograms for this process.
+
+    With ``shared_dir`` set (ideally on tmpfs such as /dev/shm), every
+    process publishes its totals to ``<shared_dir>/<pid>.json`` about once
+    per ``publish_interval`` seconds, and ``aggregate()`` sums all processes,
+    so pre-fork workers report deployment-wide numbers. Files of exited
+    workers are kept so their counts still contribute to the totals, but
+    their gauges (point-in-time readings such as queue depths) are dropped.
+    """
+
+    def __init__(self, shared_dir=None, publish_interval=1.0):
+        self.shared_dir = shared_dir
+        self.publish_interval = publish_interval
+        self._counters = {}
+        self._histograms = {}
+        self._units = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+        self._publisher = None
+        if shared_dir:
+            os.makedirs(shared_dir, exist_ok=True)
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._reset_after_fork())
+
+    def counter(self, name):
+        counter = self._counters.get(name)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(name, ShardedCounter())
+        return counter
+
+    def histogram(self, name, unit='seconds'):
+        """Histogram of positive values; unit is 'seconds' for latencies"""
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, LatencyHistogram())
+                self._units.setdefault(name, unit)
+            self._ensure_publisher()
+        return histogram
+
+    def gauge(self, name, read):
+        """Register a callable sampled whenever stats are read or published"""
+        with self._lock:
+            self._gauges[name] = read
+
+    def inc(self, name, amount=1):
+        self.counter(name).inc(amount)
+        self._ensure_publisher()
+
+    def local_state(self):
+        """This process's counters and sparse histogram buckets"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = dict(self._histograms)
+            units = dict(self._units)
+            gauges = dict(self._gauges)
+        return {
+            'counters': {name: counter.value for name, counter in counters.items()},
+            'histograms': {name: histogram.buckets() for name, histogram in histograms.items()},
+            'units': units,
+            'gauges': {name: read() for name, read in gauges.items()}
+        }
+
+    def aggregate(self):
+        """Counters and latency summaries summed over every publishing process"""
+        states = [self.local_state()]
+        if self.shared_dir:
+            self.publish(states[0])
+            states = []
+            for path in glob.glob(os.path.join(self.shared_dir, '*.json')):
+                try:
+                    with open(path) as f:
+                        state = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if not _process_alive(os.path.basename(path)[:-len('.json')]):
+                    state['gauges'] = {}
+                states.append(state)
+
+        counters = {}
+        gauges = {}
+        histograms = {}
+        units = {}
+        for state in states:
+            for name, value in state['counters'].items():
+                counters[name] = counters.get(name, 0) + value
+            for name, value in state.get('gauges', {}).items():
+                gauges[name] = gauges.get(name, 0) + value
+            units.update(state.get('units', {}))
+            for name, (buckets, total, maximum) in state['histograms'].items():
+                merged = histograms.setdefault(name, [{}, 0.0, 0.0])
+                for index, count in buckets.items():
+                    index = int(index)
+                    merged[0][index] = merged[0].get(index, 0) + count
+                merged[1] += total
+                merged[2] = max(merged[2], maximum)
+
+        return {
+            'processes': len(states),
+            'counters': counters,
+            'gauges': gauges,
+            'histograms': histograms,
+            'units': units,
+            'latency': {name: summarize(*merged) for name, merged in histograms.items()
+                        if units.get(name, 'seconds') == 'seconds'},
+            'distributions': {name: summarize(*merged, unit=units[name]) for name, merged in histograms.items()
+                              if units.get(name, 'seconds') != 'seconds'}
+        }
+
+    def publish(self, state=None):
+        if not self.shared_dir:
+            return
+        state = state or self.local_state()
+        path = os.path.join(self.shared_dir, f'{os.getpid()}.json')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    def _ensure_publisher(self):
+        if not self.shared_dir or self._publisher is not None:
+            return
+        with self._lock:
+            if self._publisher is None:
+                self._publisher = threading.Thread(target=self._publish_loop, name='metrics-publisher', daemon=True)
+                self._publisher.start()
+
+    def _publish_loop(self):
+        while True:
+            time.sleep(self.publish_interval)
+            try:
+                self.publish()
+            except OSError as e:
+                print(f"Error publishing metrics: {e}")
+
+    def _reset_after_fork(self):
+        # A forked worker starts from zero; the parent's totals stay in its own file
+        self._lock = threading.Lock()
+        self._publisher = None
+        for metric in list(self._counters.values()) + list(self._histograms.values()):
+            metric._reset()
+
+
+def _process_alive(pid):
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+LATENCY_BOUNDS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BOUNDS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+def prometheus_text(aggregate, labels=None, prefix='truthguard'):
+    """Render an ``aggregate()`` result in the Prometheus text exposition format.
+
+    Metric names of the form ``family:value`` (e.g. ``stage:text.forward``)
+    become one ``<prefix>_<family>`` metric with the value as a label.
+    Fine-grained histogram buckets are folded into fixed Prometheus bounds.
+    """
+    base_labels = dict(labels or {})
+    lines = []
+
+    def series(name, extra=None):
+        merged = dict(base_labels, **(extra or {}))
+        if not merged:
+            return name
+        rendered = ','.join(f'{k}="{_escape(v)}"' for k, v in sorted(merged.items()))
+        return f'{name}{{{rendered}}}'
+
+    def split(name):
+        family, _, value = name.partition(':')
+        return _sanitize(family), ({family: value} if value else {})
+
+    for kind, values, suffix in (('counter', aggregate['counters'], '_total'), ('gauge', aggregate['gauges'], '')):
+        typed = set()
+        for name, value in sorted(values.items()):
+            family, extra = split(name)
+            metric = f'{prefix}_{family}{suffix}'
+            if metric not in typed:
+                lines.append(f'# TYPE {metric} {kind}')
+                typed.add(metric)
+            lines.append(f'{series(metric, extra)} {value}')
+
+    typed = set()
+    for name, (buckets, total, _) in sorted(aggregate['histograms'].items()):
+        unit = aggregate['units'].get(name, 'seconds')
+        family, extra = split(name)
+        metric = f'{prefix}_{family}_{"duration_seconds" if unit == "seconds" else unit}'
+        if metric not in typed:
+            lines.append(f'# TYPE {metric} histogram')
+            typed.add(metric)
+        bounds = LATENCY_BOUNDS if unit == 'seconds' else SIZE_BOUNDS
+        ordered = sorted((int(index), count) for index, count in buckets.items())
+        cumulative = 0
+        position = 0
+        for bound in bounds:
+            while position < len(ordered) and _bucket_lower_bound(ordered[position][0]) <= bound:
+                cumulative += ordered[position][1]
+                position += 1
+            lines.append(f'{series(metric + "_bucket", dict(extra, le=repr(float(bound))))} {cumulative}')
+        count = sum(count for _, count in ordered)
+        lines.append(f'{series(metric + "_bucket", dict(extra, le="+Inf"))} {count}')
+        lines.append(f'{series(metric + "_sum", extra)} {total}')
+        lines.append(f'{series(metric + "_count", extra)} {count}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def _bucket_lower_bound(index):
+    return bucket_upper_bound(index - 1) if index else 0.0
+
+
+def _sanitize(name):
+    return ''.join(c if c.isalnum() or c == '_' else '_' for c in name)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,137 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+
+from flask import Response, abort, request
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+MIN_COMPRESS_BYTES = 512
+# Relative src/href references in HTML (no scheme, no absolute path, no query or fragment)
+LOCAL_REFERENCE = re.compile(r'''\b(src|href)="(?![a-z][a-z0-9+.-]*:|/)([^"?#]+)"''', re.IGNORECASE)
+
+
+def compress_variants(data, mimetype):
+    """Encodings of a body worth sending: identity plus gzip/brotli when they help"""
+    variants = {'identity': data}
+    if len(data) < MIN_COMPRESS_BYTES or not mimetype.startswith(COMPRESSIBLE_TYPES):
+        return variants
+    variants['gzip'] = gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    return {name: body for name, body in variants.items() if name == 'identity' or len(body) < len(data)}
+
+
+def choose_encoding(variants):
+    """Best variant the client accepts, preferring brotli, then gzip"""
+    accepted = request.accept_encodings
+    for encoding in ('br', 'gzip'):
+        if encoding in variants and accepted[encoding]:
+            return encoding
+    return 'identity'
+
+
+def cached_response(variants, etag, mimetype, cache_control, last_modified=None):
+    """Serve pre-encoded variants with ETag/Last-Modified revalidation (304s)"""
+    encoding = choose_encoding(variants)
+    # Each encoding is a different representation, so it needs its own ETag
+    variant_etag = etag if encoding == 'identity' else f'{etag}-{encoding}'
+    not_modified = request.if_none_match.contains(variant_etag) if request.if_none_match else (
+        last_modified is not None and request.if_modified_since is not None
+        and int(last_modified) <= request.if_modified_since.timestamp())
+    response = Response(status=304) if not_modified else Response(variants[encoding], mimetype=mimetype)
+    if encoding != 'identity' and not not_modified:
+        response.headers['Content-Encoding'] = encoding
+    response.set_etag(variant_etag)
+    if last_modified is not None:
+        response.last_modified = int(last_modified)
+    response.headers['Cache-Control'] = cache_control
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+class StaticAssets:
+    """Serves files under ``root`` from memory with caching headers.
+
+    Each file is read once (and again only when its mtime changes) and
+    compressed ahead of time into gzip and, when the optional ``brotli``
+    package is installed, brotli variants. Responses carry an ETag from the
+    content hash and Last-Modified, and default to ``no-cache``: browsers
+    keep their copy but revalidate it (a cheap 304).
+
+    HTML pages are served with their relative ``src``/``href`` references
+    to files under ``root`` fingerprinted as ``?v=<content hash>``. A
+    request whose ``v`` matches the file's current hash is cached for
+    ``max_age`` seconds as immutable; after a deploy the pages point at new
+    URLs, so stale scripts and styles are never reused.
+    """
+
+    def __init__(self, root, max_age=7 * 24 * 3600):
+        self.root = os.path.abspath(root)
+        self.max_age = max_age
+        self._files = {}  # path -> (mtime, variants, etag, mimetype)
+        self._pages = {}  # path -> (html etag, referenced etags, variants, etag)
+        self._lock = threading.Lock()
+
+    def response(self, filename):
+        path = safe_join(self.root, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        mtime, variants, etag, mimetype = self._entry(path)
+        if mimetype == 'text/html':
+            variants, etag = self._fingerprinted(path, variants['identity'], etag)
+            cache_control = 'no-cache'
+        elif request.args.get('v') == etag:
+            cache_control = f'public, max-age={self.max_age}, immutable'
+        else:
+            cache_control = 'no-cache'
+        return cached_response(variants, etag, mimetype, cache_control, last_modified=mtime)
+
+    def _entry(self, path):
+        mtime = os.stat(path).st_mtime
+        entry = self._files.get(path)
+        if entry is None or entry[0] != mtime:
+            entry = self._load(path, mtime)
+        return entry
+
+    def _load(self, path, mtime):
+        with open(path, 'rb') as f:
+            data = f.read()
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        entry = (mtime, compress_variants(data, mimetype), hashlib.sha1(data).hexdigest()[:20], mimetype)
+        with self._lock:
+            self._files[path] = entry
+        return entry
+
+    def _fingerprinted(self, path, html, html_etag):
+        """The page with ``?v=<hash>`` on its local references; rebuilt when it or any of them changes"""
+        text = html.decode('utf-8')
+        directory = os.path.dirname(path)
+        versions = {}
+        for _, reference in LOCAL_REFERENCE.findall(text):
+            target = safe_join(directory, reference)
+            if target is not None and target.startswith(self.root + os.sep) and os.path.isfile(target):
+                versions[reference] = self._entry(target)[2]
+        cached = self._pages.get(path)
+        if cached is not None and cached[0] == html_etag and cached[1] == versions:
+            return cached[2], cached[3]
+
+        def fingerprint(match):
+            attribute, reference = match.groups()
+            version = versions.get(reference)
+            return f'{attribute}="{reference}?v={version}"' if version else match.group(0)
+
+        body = LOCAL_REFERENCE.sub(fingerprint, text).encode('utf-8')
+        variants = compress_variants(body, 'text/html')
+        etag = hashlib.sha1(body).hexdigest()[:20]
+        with self._lock:
+            self._pages[path] = (html_etag, versions, variants, etag)
+        return variants, etag
@@ -0,0 +1,241 @@
+import json
+import os
+import re
+import threading
+import time
+import weakref
+
+import numpy as np
+
+# Sensor and metric names end up in alerts rendered by every dashboard
+SERIES_NAME = re.compile(r'[A-Za-z0-9_-]+')
+
+
+class RingBuffer:
+    """Fixed-capacity series of (timestamp, value) points in two NumPy arrays.
+
+    Memory is allocated once: 12 bytes per point (float64 time, float32
+    value). When full, the oldest points are overwritten.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.values = np.zeros(capacity, dtype=np.float32)
+        self.end = 0  # next write position
+        self.size = 0
+        self.in_order = True  # False once a point arrives older than its predecessor
+        self.last_time = -np.inf
+
+    @property
+    def nbytes(self):
+        return self.times.nbytes + self.values.nbytes
+
+    def extend(self, times, values):
+        times = np.asarray(times, dtype=np.float64)[-self.capacity:]
+        values = np.asarray(values, dtype=np.float32)[-self.capacity:]
+        if not len(times):
+            return
+        if times[0] < self.last_time or np.any(np.diff(times) < 0):
+            self.in_order = False
+        self.last_time = max(self.last_time, float(times.max()))
+        first = min(len(times), self.capacity - self.end)
+        self.times[self.end:self.end + first] = times[:first]
+        self.values[self.end:self.end + first] = values[:first]
+        rest = len(times) - first
+        self.times[:rest] = times[first:]
+        self.values[:rest] = values[first:]
+        self.end = (self.end + len(times)) % self.capacity
+        self.size = min(self.capacity, self.size + len(times))
+
+    def ordered(self):
+        """Copies of the stored points, oldest first and sorted by time"""
+        start = (self.end - self.size) % self.capacity
+        if start + self.size <= self.capacity:
+            times = self.times[start:start + self.size].copy()
+            values = self.values[start:start + self.size].copy()
+        else:
+            times = np.concatenate((self.times[start:], self.times[:self.end]))
+            values = np.concatenate((self.values[start:], self.values[:self.end]))
+        if not self.in_order:
+            order = np.argsort(times, kind='stable')
+            times, values = times[order], values[order]
+        return times, values
+
+    def range(self, start, end):
+        times, values = self.ordered()
+        lo, hi = np.searchsorted(times, [start, end], side='left')
+        return times[lo:hi], values[lo:hi]
+
+
+def downsample(times, values, start, end, buckets):
+    """Min, max and mean of sorted points per equal-width bucket of [start, end).
+
+    Empty buckets are omitted; each row is reported at its bucket's start time.
+    """
+    edges = np.linspace(start, end, buckets + 1)
+    bounds = np.searchsorted(times, edges, side='left')
+    counts = np.diff(bounds)
+    nonempty = counts > 0
+    offsets = bounds[:-1][nonempty]
+    if not len(offsets):
+        return {'t': [], 'min': [], 'max': [], 'mean': [], 'count': []}
+    sums = np.add.reduceat(values.astype(np.float64), offsets)
+    return {
+        't': edges[:-1][nonempty].tolist(),
+        'min': np.minimum.reduceat(values, offsets).tolist(),
+        'max': np.maximum.reduceat(values, offsets).tolist(),
+        'mean': (sums / counts[nonempty]).tolist(),
+        'count': counts[nonempty].tolist()
+    }
+
+
+def group_readings(readings, now=None):
+    """Group readings by (sensor, metric) into ``(times, values, is_boolean)`` lists.
+
+    Readings look like ``{'sensor_type', 'data': {metric: value}, 'timestamp'}``.
+    Booleans become 0/1 (and mark the series as boolean); non-numeric
+    values are skipped. Sensor and metric names must match ``SERIES_NAME``.
+    """
+    grouped = {}
+    now = now or time.time()
+    for reading in readings:
+        sensor = reading.get('sensor_type') or reading.get('sensor')
+        data = reading.get('data')
+        if not isinstance(sensor, str) or not isinstance(data, dict):
+            raise ValueError("Each reading needs a 'sensor_type' and a 'data' object")
+        if not SERIES_NAME.fullmatch(sensor):
+            raise ValueError(f"Invalid sensor name: {sensor[:64]!r}")
+        timestamp = float(reading.get('timestamp') or now)
+        for metric, value in data.items():
+            is_boolean = isinstance(value, bool)
+            if not is_boolean and not isinstance(value, (int, float)):
+                continue
+            if not SERIES_NAME.fullmatch(metric):
+                raise ValueError(f"Invalid metric name: {metric[:64]!r}")
+            points = grouped.get((sensor, metric))
+            if points is None:
+                points = grouped[(sensor, metric)] = ([], [], is_boolean)
+            points[0].append(timestamp)
+            points[1].append(float(value))
+    return grouped
+
+
+class TimeSeriesStore:
+    """In-memory sensor time series: one ring buffer per (sensor, metric).
+
+    Memory is bounded by ``max_series * capacity * 12`` bytes; readings for
+    series beyond ``max_series`` are rejected. Booleans are stored as 0/1
+    and non-numeric values are skipped. With ``snapshot_path`` set, the
+    store is restored from it on start and rewritten every
+    ``snapshot_interval`` seconds once data arrives. Each process keeps its
+    own store, so run the ingesting server with a single worker process.
+    """
+
+    def __init__(self, capacity=100000, max_series=1024, snapshot_path=None, snapshot_interval=60):
+        self.capacity = capacity
+        self.max_series = max_series
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self._series = {}
+        self._lock = threading.Lock()
+        self._snapshotter = None
+        self.rejected = 0
+        if snapshot_path and os.path.exists(snapshot_path):
+            self.load(snapshot_path)
+            print(f"✅ Restored {len(self._series)} sensor series from snapshot")
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._reset_after_fork())
+
+    def ingest(self, readings):
+        """Store readings shaped ``{'sensor_type', 'data': {metric: value}, 'timestamp'}``.
+
+        Returns the number of points stored.
+        """
+        return self.add(group_readings(readings))
+
+    def add(self, grouped):
+        """Store points grouped by ``group_readings``: one array write per series"""
+        stored = 0
+        with self._lock:
+            for key, (times, values, _) in grouped.items():
+                series = self._series.get(key)
+                if series is None:
+                    if len(self._series) >= self.max_series:
+                        self.rejected += len(times)
+                        continue
+                    series = self._series[key] = RingBuffer(self.capacity)
+                series.extend(times, values)
+                stored += len(times)
+        self._ensure_snapshotter()
+        return stored
+
+    def query(self, sensor, metric, start, end, buckets=None):
+        """Points in [start, end), downsampled to ``buckets`` rows when given"""
+        with self._lock:
+            series = self._series.get((sensor, metric))
+            if series is None:
+                return None
+            times, values = series.range(start, end)
+        if buckets:
+            return downsample(times, values, start, end, buckets)
+        return {'t': times.tolist(), 'value': values.tolist()}
+
+    def series(self):
+        with self._lock:
+            return [{'sensor': sensor, 'metric': metric, 'points': buffer.size,
+                     'last_timestamp': buffer.last_time if buffer.size else None}
+                    for (sensor, metric), buffer in sorted(self._series.items())]
+
+    def stats(self):
+        with self._lock:
+            buffers = list(self._series.values())
+        return {
+            'series': len(buffers),
+            'points': sum(buffer.size for buffer in buffers),
+            'bytes': sum(buffer.nbytes for buffer in buffers),
+            'capacity_per_series': self.capacity,
+            'max_series': self.max_series,
+            'rejected_points': self.rejected
+        }
+
+    def snapshot(self, path=None):
+        path = path or self.snapshot_path
+        arrays = {}
+        names = []
+        with self._lock:
+            for i, ((sensor, metric), buffer) in enumerate(self._series.items()):
+                names.append([sensor, metric])
+                arrays[f't{i}'], arrays[f'v{i}'] = buffer.ordered()
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, names=np.array(json.dumps(names)), **arrays)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        with np.load(path) as data:
+            names = json.loads(str(data['names']))
+            with self._lock:
+                for i, (sensor, metric) in enumerate(names[:self.max_series]):
+                    buffer = self._series[(sensor, metric)] = RingBuffer(self.capacity)
+                    buffer.extend(data[f't{i}'], data[f'v{i}'])
+
+    def _ensure_snapshotter(self):
+        if not self.snapshot_path or self._snapshotter is not None:
+            return
+        with self._lock:
+            if self._snapshotter is None:
+                self._snapshotter = threading.Thread(target=self._snapshot_loop, name='sensor-snapshots', daemon=True)
+                self._snapshotter.start()
+
+    def _snapshot_loop(self):
+        while True:
+            time.sleep(self.snapshot_interval)
+            try:
+                self.snapshot()
+            except OSError as e:
+                print(f"Error writing sensor snapshot: {e}")
+
+    def _reset_after_fork(self):
+        self._lock = threading.Lock()
+        self._snapshotter = None
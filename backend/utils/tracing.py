@@ -0,0 +1,59 @@
+from time import perf_counter
+
+
+class _Span:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.record(perf_counter() - self.start)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Per-stage timers recorded into ``stage:<name>`` latency histograms.
+
+    A span costs two perf_counter calls and one lock-free histogram update;
+    when disabled (the default until ``configure`` is called) ``span``
+    returns a shared no-op context manager.
+    """
+
+    def __init__(self):
+        self.metrics = None
+        self.enabled = False
+        self._histograms = {}
+
+    def configure(self, metrics, enabled=True):
+        self.metrics = metrics
+        self.enabled = enabled and metrics is not None
+        self._histograms = {}
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = self.metrics.histogram('stage:' + name)
+        return _Span(histogram)
+
+
+# Process-wide tracer; the app points it at its MetricsRegistry
+tracer = Tracer()
@@ -14,8 +14,13 @@ socket.on('disconnect', function() {
   document.getElementById('connectionStatus').className = 'h-2 w-2 rounded-full bg-red-400';
 });
 
-socket.on('detection_update', function(data) {
-  updateRecentResults(data);
+// Updates arrive in batches: {events: [{type, result}], stats, dropped}.
+// Acknowledging a batch tells the server this client is ready for the next.
+socket.on('detection_update', function(payload, ack) {
+  const batch = typeof payload === 'string' ? JSON.parse(payload) : payload;
+  (batch.events || []).forEach(updateRecentResults);
+  (batch.alerts || []).forEach(showSensorAlert);
+  if (ack) ack();
 });
 
 // Mode switching
@@ -45,7 +50,7 @@ function analyzeText() {
 
   fetch('/api/detect-text', {
     method: 'POST',
-    headers: { 'Content-Type': 'application/json' },
+    headers: { 'Content-Type': 'application/json', 'X-Request-Lane': 'interactive' },
     body: JSON.stringify({ text: text })
   })
   .then(response => response.json())
@@ -81,7 +86,7 @@ function analyzeImage() {
 
     fetch('/api/detect-image', {
       method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
+      headers: { 'Content-Type': 'application/json', 'X-Request-Lane': 'interactive' },
       body: JSON.stringify({ image: e.target.result })
     })
     .then(response => response.json())
@@ -165,6 +170,25 @@ function handleImageUpload(event) {
   }
 }
 
+// Sensor anomaly alerts share the recent results feed
+function showSensorAlert(alert) {
+  const container = document.getElementById('recentResults');
+  const alertItem = document.createElement('div');
+  alertItem.className = 'bg-gray-800 p-3 rounded-lg border-l-4 border-yellow-500';
+  // Alert fields come from sensor submissions, so they are set as text, never as HTML
+  const title = document.createElement('div');
+  title.className = 'font-medium text-yellow-400';
+  title.textContent = `Sensor ${alert.type}: ${alert.metric}`;
+  const detail = document.createElement('div');
+  detail.className = 'text-xs text-gray-400';
+  detail.textContent = `${String(alert.sensor).toUpperCase()} • ${new Date(alert.timestamp * 1000).toLocaleTimeString()}`;
+  alertItem.append(title, detail);
+  container.insertBefore(alertItem, container.firstChild);
+  while (container.children.length > 5) {
+    container.removeChild(container.lastChild);
+  }
+}
+
 // Update recent results
 function updateRecentResults(data) {
   const container = document.getElementById('recentResults');
@@ -0,0 +1,245 @@
+import argparse
+import asyncio
+import heapq
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from sensor_integration import BiometricSensor, EnvironmentalSensor, SecuritySensor
+
+
+class AsyncSensorScheduler:
+    """Drives any number of sensors from one asyncio loop.
+
+    Sensors are any objects with ``read_data()`` and ``read_interval`` (the
+    classes in sensor_integration.py work unchanged). A heap orders them by
+    their next due time, so thousands of sensors cost one task, not one
+    thread each. Readings are buffered and POSTed every ``flush_interval``
+    as ``{'readings': [...]}`` over a pooled keep-alive session.
+
+    Failed uploads go to a JSONL spool on disk (capped at
+    ``spool_max_bytes``, oldest readings dropped first). Uploads then back
+    off exponentially with jitter, and the spool is replayed in order once
+    the server accepts data again. Only connection errors, timeouts, 5xx,
+    408 and 429 responses are retried; a batch the server rejects with any
+    other 4xx would be rejected forever, so it is moved to
+    ``<spool>.rejected.jsonl`` (same size cap) instead of blocking replay,
+    as are spool lines that no longer parse (e.g. cut short by a crash).
+    """
+
+    def __init__(self, sensors, server_url="http://localhost:5000", flush_interval=1.0, max_batch=1000,
+                 spool_path="sensor_spool.jsonl", spool_max_bytes=50 * 1024 * 1024,
+                 base_backoff=1.0, max_backoff=60.0, timeout=5):
+        self.sensors = sensors
+        self.url = f"{server_url}/api/sensor-data"
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.spool_path = spool_path
+        self.rejected_path = os.path.splitext(spool_path)[0] + '.rejected.jsonl'
+        self.spool_max_bytes = spool_max_bytes
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        # One I/O thread keeps uploads and spool writes in order
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sensor-upload')
+        self._buffer = []
+        self._failures = 0
+        self._retry_at = 0.0
+        self._stopping = None
+        self.stats = {'readings': 0, 'read_errors': 0, 'uploaded': 0, 'spooled': 0, 'replayed': 0, 'spool_dropped': 0,
+                      'rejected': 0, 'spool_corrupt': 0}
+
+    async def run(self, duration=None):
+        self._stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        if duration:
+            loop.call_later(duration, self._stopping.set)
+        flusher = asyncio.create_task(self._flush_loop())
+        try:
+            await self._read_loop()
+        finally:
+            await flusher
+            await self._flush()
+            self.session.close()
+            self._io.shutdown()
+
+    def stop(self):
+        if self._stopping is not None:
+            self._stopping.set()
+
+    async def _read_loop(self):
+        now = time.monotonic()
+        # Spread first reads over each interval so a fleet doesn't fire at once
+        schedule = [(now + random.uniform(0, sensor.read_interval), name) for name, sensor in self.sensors.items()]
+        heapq.heapify(schedule)
+        while not self._stopping.is_set() and schedule:
+            due, name = schedule[0]
+            delay = due - time.monotonic()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+            sensor = self.sensors[name]
+            try:
+                self._buffer.append({'sensor_type': name, 'data': sensor.read_data(), 'timestamp': time.time()})
+                self.stats['readings'] += 1
+            except Exception as e:
+                self.stats['read_errors'] += 1
+                print(f"Error reading {name} sensor: {e}")
+            # Next slot from the due time, not from now, so intervals don't drift
+            heapq.heapreplace(schedule, (due + sensor.read_interval, name))
+
+    async def _flush_loop(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                await self._flush()
+
+    async def _flush(self):
+        batch, self._buffer = self._buffer, []
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._io, self._deliver, batch)
+
+    def _deliver(self, batch):
+        """Upload a batch (replaying the spool first), spooling it on failure"""
+        if time.monotonic() < self._retry_at:
+            self._spool(batch)
+            return
+        if os.path.exists(self.spool_path) and not self._replay_spool():
+            self._spool(batch)
+            return
+        for start in range(0, len(batch), self.max_batch):
+            if not self._upload(batch[start:start + self.max_batch]):
+                self._spool(batch[start:])
+                return
+
+    def _upload(self, readings):
+        """POST one batch; False if it should be retried later.
+
+        A batch rejected with a non-retryable 4xx is quarantined and counts
+        as delivered, so it never blocks the batches behind it.
+        """
+        try:
+            response = self.session.post(self.url, json={'readings': readings}, timeout=self.timeout)
+            if 400 <= response.status_code < 500 and response.status_code not in (408, 429):
+                self._failures = 0  # the server is up; this batch is the problem
+                self._quarantine(readings, response)
+                return True
+            response.raise_for_status()
+        except requests.RequestException as e:
+            self._failures += 1
+            backoff = min(self.max_backoff, self.base_backoff * 2 ** (self._failures - 1))
+            self._retry_at = time.monotonic() + backoff * random.uniform(0.5, 1.0)
+            print(f"Error sending sensor data (retrying in up to {backoff:.1f}s): {e}")
+            return False
+        self._failures = 0
+        self.stats['uploaded'] += len(readings)
+        return True
+
+    def _quarantine(self, readings, response):
+        print(f"Server rejected {len(readings)} sensor readings ({response.status_code}: "
+              f"{response.text[:200]}); moved to {self.rejected_path}")
+        self.stats['rejected'] += len(readings)
+        if os.path.exists(self.rejected_path) and os.path.getsize(self.rejected_path) > self.spool_max_bytes:
+            return
+        with open(self.rejected_path, 'a') as f:
+            for reading in readings:
+                f.write(json.dumps(reading) + '\n')
+
+    def _spool(self, readings):
+        if not readings:
+            return
+        with open(self.spool_path, 'a') as f:
+            for reading in readings:
+                f.write(json.dumps(reading) + '\n')
+        self.stats['spooled'] += len(readings)
+        if os.path.getsize(self.spool_path) > self.spool_max_bytes:
+            self._trim_spool()
+
+    def _trim_spool(self):
+        # Keep the newest readings within half the cap, so trimming stays rare
+        with open(self.spool_path) as f:
+            lines = f.readlines()
+        kept = []
+        size = 0
+        for line in reversed(lines):
+            size += len(line)
+            if size > self.spool_max_bytes // 2:
+                break
+            kept.append(line)
+        self.stats['spool_dropped'] += len(lines) - len(kept)
+        self._rewrite_spool(reversed(kept))
+
+    def _replay_spool(self):
+        """Send spooled readings oldest first; returns True once the spool is empty"""
+        with open(self.spool_path) as f:
+            lines, readings = self._parse_spool(f.readlines())
+        for start in range(0, len(lines), self.max_batch):
+            chunk = readings[start:start + self.max_batch]
+            if not self._upload(chunk):
+                self._rewrite_spool(lines[start:])
+                return False
+            self.stats['replayed'] += len(chunk)
+        os.remove(self.spool_path)
+        return True
+
+    def _parse_spool(self, lines):
+        """(lines, readings) of the spool lines that parse; the rest are quarantined"""
+        kept, readings, corrupt = [], [], []
+        for line in lines:
+            try:
+                readings.append(json.loads(line))
+                kept.append(line)
+            except ValueError:
+                corrupt.append(line if line.endswith('\n') else line + '\n')
+        if corrupt:
+            print(f"Skipped {len(corrupt)} unreadable spool lines; moved to {self.rejected_path}")
+            self.stats['spool_corrupt'] += len(corrupt)
+            if not os.path.exists(self.rejected_path) or os.path.getsize(self.rejected_path) <= self.spool_max_bytes:
+                with open(self.rejected_path, 'a') as f:
+                    f.writelines(corrupt)
+        return kept, readings
+
+    def _rewrite_spool(self, lines):
+        tmp_path = self.spool_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.writelines(lines)
+        os.replace(tmp_path, self.spool_path)
+
+
+def simulated_fleet(count):
+    """``count`` simulated sensors cycling through the three sensor kinds"""
+    kinds = [('environmental', EnvironmentalSensor), ('biometric', BiometricSensor), ('security', SecuritySensor)]
+    return {f'{kinds[i % 3][0]}-{i:05d}': kinds[i % 3][1]() for i in range(count)}
+
+
+# Usage example
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run simulated sensors on one asyncio scheduler")
+    parser.add_argument('--server', default="http://localhost:5000")
+    parser.add_argument('--sensors', type=int, default=3, help="number of simulated sensors")
+    parser.add_argument('--flush-interval', type=float, default=1.0)
+    parser.add_argument('--duration', type=float, help="stop after this many seconds")
+    parser.add_argument('--spool', default="sensor_spool.jsonl")
+    args = parser.parse_args()
+
+    scheduler = AsyncSensorScheduler(simulated_fleet(args.sensors), args.server,
+                                     flush_interval=args.flush_interval, spool_path=args.spool)
+    print(f"IoT monitoring started for {args.sensors} sensors. Press Ctrl+C to stop...")
+    try:
+        asyncio.run(scheduler.run(duration=args.duration))
+    except KeyboardInterrupt:
+        pass
+    print(f"IoT monitoring stopped. {scheduler.stats}")